@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""Backfill one combined page per day (or week) over a past date span.
+
+Each source is fetched once for the whole span (through the day-partition
+planner, so already materialized days cost nothing). The Eastmoney news list can
+only be walked from today backwards, so `--max-pages` must be large enough to
+reach the span's start; days the walk did not reach are flagged in each page's
+status note rather than shown as empty. Items are bucketed by period in a single
+pass, and the per-period pages are rendered and written across a process pool.
+Pages share one set of theme assets and are recorded in the page
+manifest (each appends one row to `index.html`).
+
+Usage:
+  python3 scripts/backfill_pages.py --start 2025-10-01 --end 2025-12-31 [--per day|week] [--codes 688111,HK2097] [--theme classic] [--out-dir Data] [--name daily] [--workers N] [--max-pages 1000] [--refresh] [--standalone]
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+import build_combined_news as builder
+import range_planner
+import theme_assets
+
+
+def periods(start: str, end: str, per: str = "day"):
+    """Inclusive (period_start, period_end) pairs covering the span; weeks run Monday-Sunday, clipped to it."""
+    days = range_planner.day_range(start, end)
+    if per == "day":
+        return [(d, d) for d in days]
+    out = []
+    for d in days:
+        dt = datetime.strptime(d, "%Y-%m-%d").date()
+        if not out or dt.weekday() == 0:
+            out.append([d, d])
+        else:
+            out[-1][1] = d
+    return [(s, e) for s, e in out]
+
+
+def bucket_items(items, date_of, period_of):
+    """One pass over `items`: {period_start: [items]} (items outside every period are dropped)."""
+    buckets = {}
+    for it in items or []:
+        key = period_of.get((date_of(it) or "")[:10])
+        if key is not None:
+            buckets.setdefault(key, []).append(it)
+    return buckets
+
+
+def _render_period(job):
+    """Worker: render and write one period page; returns (path, counts)."""
+    domestic = job["domestic"]
+    international = job["international"]
+    industry_reports = job["industry"]
+    stock_sections = job["stocks"]
+    html = builder.build_html_combined(
+        domestic, international, industry_reports, stock_sections,
+        theme=job["theme"], page_title=builder.page_title_for(job["start"], job["end"]),
+        section_status=job["status"], assets=job["assets"],
+    )
+    counts = builder.section_counts(domestic, international, industry_reports, stock_sections)
+    path = builder.write_page(
+        job["out_path"], html, append_ts=False, start=job["start"], end=job["end"],
+        codes=list(stock_sections), counts=counts, theme=job["theme"],
+    )
+    return path, counts
+
+
+def backfill(start: str, end: str, codes=None, per: str = "day", theme: str = "classic", out_dir: str = "Data",
+             name: str = None, workers: int = None, refresh: bool = False, standalone: bool = False,
+             deadline: float = None, max_pages: int = 1000):
+    """Fetch the span once, then write one page per period; returns the written paths in date order."""
+    codes = codes or []
+    name = name or ("daily" if per == "day" else "weekly")
+    east = builder._load_module(os.path.join(HERE, "fetch_eastmoney_cgnjj.py"))
+    ths = builder._load_module(os.path.join(HERE, "fetch_10jqka_stock_news.py"))
+
+    tasks = {
+        "domestic": lambda: builder.fetch_column(east, 350, start, end, refresh, max_pages=max_pages),
+        "international": lambda: builder.fetch_column(east, 351, start, end, refresh, max_pages=max_pages),
+        "industry": lambda: builder.fetch_industry(east, start, end, refresh, max_pages=max_pages),
+    }
+    for code in codes:
+        tasks[f"stock-{code}"] = (lambda c=code: builder.fetch_stock(ths, c, start, end, refresh))
+    t0 = time.time()
+    results, status = builder.run_with_deadline(tasks, deadline)
+    for sid, note in status.items():
+        print(f"[warn] {sid}: {note}")
+    for sid, items in results.items():
+        note = builder.uncovered_note(items, start, end)
+        if note:
+            print(f"[warn] {sid}: {note}（可调大 --max-pages）")
+    print(f"Fetched {start} 至 {end} in {time.time() - t0:.1f}s")
+
+    spans = periods(start, end, per)
+    period_of = {}
+    for ps, pe in spans:
+        for d in range_planner.day_range(ps, pe):
+            period_of[d] = ps
+    domestic = bucket_items(results.get("domestic"), lambda it: it.get("showTime"), period_of)
+    international = bucket_items(results.get("international"), lambda it: it.get("showTime"), period_of)
+    industry = bucket_items(results.get("industry"), lambda it: it.get("publishDate"), period_of)
+    stocks = {}
+    for code in codes:
+        sec = results.get(f"stock-{code}") or {"hot_news": [], "related_reports": []}
+        stocks[code] = (
+            bucket_items(sec["hot_news"], lambda it: it.get("date"), period_of),
+            bucket_items(sec["related_reports"], lambda it: it.get("date"), period_of),
+        )
+
+    assets = None if standalone else theme_assets.write_assets(out_dir, theme)
+    jobs = []
+    for ps, pe in spans:
+        jobs.append({
+            "start": ps,
+            "end": pe,
+            "out_path": os.path.join(out_dir, f"{name}_{ps}.html"),
+            "theme": theme,
+            "assets": assets,
+            "status": builder.add_coverage_status(dict(status), results, ps, pe),
+            "domestic": domestic.get(ps, []),
+            "international": international.get(ps, []),
+            "industry": industry.get(ps, []),
+            "stocks": {
+                code: {"hot_news": hot.get(ps, []), "related_reports": rep.get(ps, []), "range_start": ps, "range_end": pe}
+                for code, (hot, rep) in stocks.items()
+            },
+        })
+
+    t1 = time.time()
+    chunk = max(1, len(jobs) // (4 * (workers or os.cpu_count() or 1)))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        paths = [path for path, _ in pool.map(_render_period, jobs, chunksize=chunk)]
+    print(f"Rendered {len(paths)} pages in {time.time() - t1:.1f}s")
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill one combined page per day or week over a date span")
+    parser.add_argument("--start", required=True, help="YYYY-MM-DD")
+    parser.add_argument("--end", required=True, help="YYYY-MM-DD")
+    parser.add_argument("--per", choices=("day", "week"), default="day", help="One page per day (default) or per Monday-Sunday week")
+    parser.add_argument("--codes", default="", help="Comma-separated stock codes, e.g. 688111,HK2097")
+    parser.add_argument("--theme", default="classic", help="classic|neon|glass|terminal")
+    parser.add_argument("--out-dir", default="Data", help="Output directory (default Data)")
+    parser.add_argument("--name", default=None, help="Page name prefix (default daily/weekly)")
+    parser.add_argument("--workers", type=int, default=None, help="Render processes (default CPU count)")
+    parser.add_argument("--deadline", type=float, default=None, help="Time budget (seconds) for the fetch pass")
+    parser.add_argument("--max-pages", type=int, default=1000, help="Page cap per source walk (default 1000; must reach back to --start)")
+    parser.add_argument("--refresh", action="store_true", help="Ignore stored day partitions and refetch the span")
+    parser.add_argument("--standalone", action="store_true", help="Inline CSS/JS instead of linking assets/")
+    args = parser.parse_args()
+
+    if args.end < args.start:
+        print("[error] --end must not be before --start", file=sys.stderr)
+        sys.exit(1)
+    codes = [c.strip() for c in args.codes.split(",") if c.strip()]
+    paths = backfill(
+        args.start, args.end, codes, per=args.per, theme=args.theme, out_dir=args.out_dir, name=args.name,
+        workers=args.workers, refresh=args.refresh, standalone=args.standalone, deadline=args.deadline,
+        max_pages=args.max_pages,
+    )
+    if paths:
+        print(f"Wrote {paths[0]} … {paths[-1]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""Persistent local bar store for Tushare `pro_bar` results.
+
+Bars live in one SQLite table clustered on (ts_code, freq, trade_date), so each
+code/frequency is a contiguous key range; reads go through SQLite's memory-mapped
+I/O (`PRAGMA mmap_size`). A `sync` table records when each series was last pulled,
+which lets callers skip the API entirely once a weekly bar is closed.
+"""
+import os
+import sqlite3
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+
+DEFAULT_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "bars.sqlite")
+BAR_COLUMNS = ["open", "high", "low", "close", "pre_close", "change", "pct_chg", "vol", "amount"]
+# A-share close (Beijing time, as the local clock is assumed to be)
+MARKET_CLOSE = (15, 30)
+
+
+class BarStore:
+    def __init__(self, path: str = None, mmap_bytes: int = 256 * 1024 * 1024):
+        self.path = os.path.abspath(path or DEFAULT_DB)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self.conn.execute(f"PRAGMA mmap_size={int(mmap_bytes)}")
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        cols = ", ".join(f"{c} REAL" for c in BAR_COLUMNS)
+        self.conn.execute(
+            f"CREATE TABLE IF NOT EXISTS bars (ts_code TEXT NOT NULL, freq TEXT NOT NULL, trade_date TEXT NOT NULL, {cols}, "
+            "PRIMARY KEY (ts_code, freq, trade_date)) WITHOUT ROWID"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS sync (ts_code TEXT NOT NULL, freq TEXT NOT NULL, synced_at TEXT NOT NULL, "
+            "PRIMARY KEY (ts_code, freq))"
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def last_trade_date(self, ts_code: str, freq: str = "W"):
+        row = self.conn.execute(
+            "SELECT MAX(trade_date) FROM bars WHERE ts_code=? AND freq=?", (ts_code, freq)
+        ).fetchone()
+        return row[0] if row else None
+
+    def synced_at(self, ts_code: str, freq: str = "W"):
+        row = self.conn.execute(
+            "SELECT synced_at FROM sync WHERE ts_code=? AND freq=?", (ts_code, freq)
+        ).fetchone()
+        return datetime.fromisoformat(row[0]) if row else None
+
+    def replace_from(self, ts_code: str, freq: str, since: str, df, synced_at: datetime = None):
+        """Replace stored bars with trade_date >= `since` (YYYYMMDD) by the rows of `df`."""
+        rows = []
+        if df is not None and not df.empty:
+            for rec in df.to_dict("records"):
+                td = str(rec.get("trade_date") or "")
+                if td >= since:
+                    rows.append((ts_code, freq, td) + tuple(_num(rec.get(c)) for c in BAR_COLUMNS))
+        if not rows:
+            # Nothing came back (API hiccup or no new bars): keep what is stored, do not mark synced
+            return 0
+        placeholders = ", ".join("?" for _ in range(3 + len(BAR_COLUMNS)))
+        with self.conn:
+            self.conn.execute(
+                "DELETE FROM bars WHERE ts_code=? AND freq=? AND trade_date>=?", (ts_code, freq, since)
+            )
+            self.conn.executemany(
+                f"INSERT INTO bars (ts_code, freq, trade_date, {', '.join(BAR_COLUMNS)}) VALUES ({placeholders})", rows
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sync (ts_code, freq, synced_at) VALUES (?, ?, ?)",
+                (ts_code, freq, (synced_at or datetime.now()).isoformat(timespec="seconds")),
+            )
+        return len(rows)
+
+    def read(self, ts_code: str, freq: str = "W", last: int = None):
+        """Return bars for one code sorted by date, optionally only the last N."""
+        return self.read_many([ts_code], freq=freq, last=last)
+
+    def read_many(self, ts_codes, freq: str = "W", last: int = None):
+        """Return a long frame (ts_code, trade_date, date, bar columns) sorted by code and date."""
+        frames = []
+        cols = ", ".join(BAR_COLUMNS)
+        for code in ts_codes:
+            if last:
+                sql = (f"SELECT * FROM (SELECT ts_code, trade_date, {cols} FROM bars WHERE ts_code=? AND freq=? "
+                       "ORDER BY trade_date DESC LIMIT ?) ORDER BY trade_date")
+                params = (code, freq, int(last))
+            else:
+                sql = f"SELECT ts_code, trade_date, {cols} FROM bars WHERE ts_code=? AND freq=? ORDER BY trade_date"
+                params = (code, freq)
+            frames.append(pd.read_sql_query(sql, self.conn, params=params))
+        if not frames:
+            return pd.DataFrame(columns=["ts_code", "trade_date", "date"] + BAR_COLUMNS)
+        df = pd.concat(frames, ignore_index=True)
+        df["date"] = pd.to_datetime(df["trade_date"], format="%Y%m%d")
+        return df
+
+
+def _num(v):
+    try:
+        return None if v is None or pd.isna(v) else float(v)
+    except (TypeError, ValueError):
+        return None
+
+
+def week_start(d):
+    return d - timedelta(days=d.weekday())
+
+
+def last_weekly_close(now: datetime) -> datetime:
+    """Most recent Friday market close at or before `now`."""
+    friday = (now - timedelta(days=(now.weekday() - 4) % 7)).replace(
+        hour=MARKET_CLOSE[0], minute=MARKET_CLOSE[1], second=0, microsecond=0
+    )
+    if friday > now:
+        friday -= timedelta(days=7)
+    return friday
+
+
+def plan_weekly_fetch(store: BarStore, ts_code: str, history_weeks: int = 20, now: datetime = None):
+    """Return (start, end) YYYYMMDD to pull for a weekly series, or None when the store is current.
+
+    The stored bar of the last week may be a partial (in-progress) bar, so the pull
+    restarts at the Monday of that week and replaces it. On weekends, once the store
+    was synced after Friday's close, no call is needed.
+    """
+    now = now or datetime.now()
+    end = now.strftime("%Y%m%d")
+    last = store.last_trade_date(ts_code, "W")
+    if not last:
+        return (now.date() - timedelta(weeks=history_weeks)).strftime("%Y%m%d"), end
+    synced = store.synced_at(ts_code, "W")
+    close = last_weekly_close(now)
+    # Between Friday's close and Monday the current weekly bar can no longer change
+    week_closed = now.weekday() >= 5 or (now.weekday() == 4 and now >= close)
+    if week_closed and synced and synced >= close:
+        return None
+    start = week_start(datetime.strptime(last, "%Y%m%d").date())
+    return start.strftime("%Y%m%d"), end
@@ -1,10 +1,20 @@
 #!/usr/bin/env python3
 import sys
 import os
+import time
+import threading
+import queue
 import importlib.util
-from datetime import datetime
+from datetime import datetime, timedelta
 from urllib.request import Request, urlopen
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import range_planner
+import export_items
+import page_archive
+import theme_assets
+import keyword_trends
+
 
 def _load_module(path: str):
     spec = importlib.util.spec_from_file_location("mod", path)
@@ -13,85 +23,239 @@ def _load_module(path: str):
     return mod
 
 
-def in_range(date_str: str, start: str, end: str) -> bool:
-    try:
-        d = datetime.strptime(date_str[:10], "%Y-%m-%d")
-        s = datetime.strptime(start, "%Y-%m-%d")
-        e = datetime.strptime(end, "%Y-%m-%d")
-        return s <= d <= e
-    except Exception:
-        return True
-
-
-def _theme_css(theme: str) -> str:
-    t = (theme or "classic").lower()
-    if t == "neon":
-        return (
-            "body{background:#0b0f19;color:#d1d5db;font-family:Inter,Roboto,system-ui,-apple-system,BlinkMacSystemFont,'Segoe UI','Helvetica Neue',Arial,'Noto Sans','PingFang SC','Microsoft YaHei',sans-serif;margin:0;}\n"
-            ".container{max-width:1080px;margin:24px auto;padding:24px;}\n"
-            ".title{font-size:22px;margin:0 0 16px;background:linear-gradient(90deg,#00e5ff,#a855f7);-webkit-background-clip:text;background-clip:text;color:transparent;}\n"
-            ".tabs{display:flex;flex-wrap:wrap;gap:8px;margin-bottom:16px;}\n"
-            ".tab-btn{padding:8px 12px;border:1px solid rgba(0,229,255,.35);border-radius:10px;cursor:pointer;background:rgba(2,8,23,.6);color:#9beaf9;box-shadow:0 0 8px rgba(0,229,255,.25) inset,0 0 6px rgba(168,85,247,.25);transition:all .2s;}\n"
-            ".tab-btn.active{background:rgba(168,85,247,.15);color:#e5e7eb;border-color:rgba(168,85,247,.45);}\n"
-            ".subtabs{display:flex;gap:6px;margin:8px 0 12px;}\n"
-            ".sub-btn{padding:6px 10px;border:1px solid rgba(0,229,255,.3);border-radius:8px;cursor:pointer;background:rgba(2,8,23,.5);color:#93c5fd;transition:.2s;}\n"
-            ".sub-btn.active{background:rgba(0,229,255,.12);color:#e5e7eb;border-color:rgba(0,229,255,.5);}\n"
-            ".item{border:1px solid rgba(148,163,184,.25);border-radius:12px;padding:12px;margin:10px 0;background:linear-gradient(180deg,rgba(13,18,28,.65),rgba(13,18,28,.4));box-shadow:0 2px 8px rgba(0,0,0,.35);}\n"
-            ".title-link{color:#7dd3fc;text-decoration:none;font-weight:600;}\n"
-            ".meta{color:#94a3b8;font-size:12px;margin-left:8px;}\n"
-            ".link{display:block;margin-top:6px;font-size:12px;color:#cbd5e1;}\n"
-            ".grid-bg{position:fixed;inset:0;background-image:radial-gradient(transparent 0,transparent 1px,rgba(45,212,191,.05) 1px),radial-gradient(transparent 0,transparent 1px,rgba(168,85,247,.06) 1px);background-size:20px 20px,32px 32px;pointer-events:none;opacity:.6;}\n"
-        )
-    if t == "glass":
-        return (
-            "body{background:linear-gradient(135deg,#0b1020,#121a2e 50%,#0b1020);color:#e2e8f0;font-family:Inter,system-ui,-apple-system,BlinkMacSystemFont,'Segoe UI','Helvetica Neue','PingFang SC','Microsoft YaHei',sans-serif;margin:0;}\n"
-            ".container{max-width:1080px;margin:24px auto;padding:24px;}\n"
-            ".title{font-size:22px;margin:0 0 16px;color:#e2e8f0;}\n"
-            ".tabs{display:flex;flex-wrap:wrap;gap:8px;margin-bottom:16px;}\n"
-            ".tab-btn{padding:8px 12px;border:1px solid rgba(226,232,240,.2);border-radius:12px;cursor:pointer;background:rgba(255,255,255,.06);backdrop-filter:blur(8px);color:#e2e8f0;box-shadow:0 8px 24px rgba(0,0,0,.25) inset,0 2px 8px rgba(0,0,0,.35);}\n"
-            ".tab-btn.active{background:rgba(147,197,253,.15);border-color:rgba(147,197,253,.35);}\n"
-            ".subtabs{display:flex;gap:6px;margin:8px 0 12px;}\n"
-            ".sub-btn{padding:6px 10px;border:1px solid rgba(226,232,240,.18);border-radius:10px;background:rgba(255,255,255,.05);cursor:pointer;color:#e2e8f0;}\n"
-            ".sub-btn.active{background:rgba(226,232,240,.12);}\n"
-            ".item{border:1px solid rgba(226,232,240,.18);border-radius:14px;padding:14px;margin:10px 0;background:rgba(255,255,255,.06);backdrop-filter:blur(6px);}\n"
-            ".title-link{color:#93c5fd;text-decoration:none;font-weight:600;}\n"
-            ".meta{color:#cbd5e1;font-size:12px;margin-left:8px;}\n"
-            ".link{display:block;margin-top:6px;font-size:12px;color:#e2e8f0;}\n"
-        )
-    if t == "terminal":
-        return (
-            "body{background:#0a0f0a;color:#c6f6d5;font-family:ui-monospace,SFMono-Regular,Menlo,Monaco,Consolas,'Liberation Mono','Courier New',monospace;margin:0;}\n"
-            ".container{max-width:1080px;margin:24px auto;padding:24px;}\n"
-            ".title{font-size:22px;margin:0 0 16px;color:#68d391;}\n"
-            ".tabs{display:flex;flex-wrap:wrap;gap:8px;margin-bottom:16px;}\n"
-            ".tab-btn{padding:8px 12px;border:1px solid #2f855a;border-radius:8px;cursor:pointer;background:#1a202c;color:#68d391;}\n"
-            ".tab-btn.active{background:#22543d;color:#c6f6d5;}\n"
-            ".subtabs{display:flex;gap:6px;margin:8px 0 12px;}\n"
-            ".sub-btn{padding:6px 10px;border:1px solid #2f855a;border-radius:8px;cursor:pointer;background:#0f1418;color:#68d391;}\n"
-            ".sub-btn.active{background:#22543d;color:#c6f6d5;}\n"
-            ".item{border:1px solid #2f855a;border-radius:8px;padding:12px;margin:10px 0;background:#0f1410;box-shadow:0 2px 6px rgba(0,0,0,.4);}\n"
-            ".title-link{color:#68d391;text-decoration:none;font-weight:700;}\n"
-            ".meta{color:#9ae6b4;font-size:12px;margin-left:8px;}\n"
-            ".link{display:block;margin-top:6px;font-size:12px;color:#c6f6d5;}\n"
+def _trend_hook(source: str):
+    # Keep the keyword rollups current with every fetched day; a rollup failure never fails the fetch
+    def _ingest(day_items):
+        try:
+            keyword_trends.ingest(source, day_items)
+        except Exception as e:
+            print(f"[warn] keyword trends {source}: {type(e).__name__}: {e}")
+    return _ingest
+
+
+def fetch_column(east, column: int, start: str, end: str, refresh: bool = False, max_pages: int = 100):
+    return range_planner.fetch_range(
+        f"news-{column}", start, end,
+        lambda s, e: east.get_news_by_date_range(column, s, e, max_pages=max_pages),
+        lambda it: it.get("showTime"),
+        refresh=refresh,
+        on_fetched=_trend_hook(f"news-{column}"),
+    )
+
+
+def fetch_industry(east, start: str, end: str, refresh: bool = False, max_pages: int = 50):
+    return range_planner.fetch_range(
+        "industry", start, end,
+        lambda s, e: east.fetch_industry_reports_range(s, e, max_pages=max_pages),
+        lambda it: it.get("publishDate"),
+        refresh=refresh,
+        on_fetched=_trend_hook("industry"),
+    )
+
+
+def fetch_stock(ths, code: str, rs: str, re: str, refresh: bool = False):
+    def _fetch(_s, _e):
+        # 10jqka pages have no date parameter: one fetch returns the latest items
+        if code.upper().startswith("HK"):
+            return [dict(it, kind="hot") for it in ths.fetch_hk_news_json(code, page=1, limit=100)]
+        url = f"{ths.STOCKPAGE_BASE}/ajax/code/{code}/type/news/"
+        # use module fetch_text to honor headers
+        html = ths.fetch_text(url, referer=f"{ths.STOCKPAGE_BASE}/{code}/news/", encoding="gbk")
+        news_items, report_items = ths.parse_ashare_news_and_reports(html)
+        return [dict(it, kind="hot") for it in news_items] + [dict(it, kind="report") for it in report_items]
+
+    items = range_planner.fetch_range(
+        f"stock-{code}", rs, re, _fetch, lambda it: it.get("date"), refresh=refresh, truncated=True,
+    )
+    return {
+        "hot_news": [it for it in items if it.get("kind") == "hot"],
+        "related_reports": [it for it in items if it.get("kind") == "report"],
+    }
+
+
+def uncovered_note(items, start: str, end: str):
+    """Status note for days in [start, end] that a cut-off fetch did not fully reach, or None."""
+    days = [d for d in getattr(items, "uncovered", ()) if start <= d <= end]
+    if not days:
+        return None
+    span = days[0] if len(days) == 1 else f"{days[0]} 至 {days[-1]}"
+    return f"{span} 共 {len(days)} 天超出抓取深度，条目可能不完整"
+
+
+def add_coverage_status(section_status: dict, results: dict, start: str, end: str):
+    """Add an `uncovered_note` for each section whose result was cut off (keeps existing notes)."""
+    for sid, items in results.items():
+        note = uncovered_note(items, start, end)
+        if note and sid not in section_status:
+            section_status[sid] = note
+    return section_status
+
+
+# Concurrent fetches per build; keeps a long --codes list from hitting 10jqka all at once
+MAX_FETCH_WORKERS = 4
+
+
+def run_with_deadline(tasks, deadline: float = None, max_workers: int = MAX_FETCH_WORKERS):
+    """Run named fetch tasks on a bounded pool, honoring an overall time budget (seconds).
+
+    `tasks` maps a section id to a zero-arg callable; at most `max_workers` run at
+    once. Returns `(results, status)`: `results[sid]` holds the value of every task
+    that finished in time, and `status[sid]` is a short note for sections that timed
+    out (running or still queued) or raised. Workers are daemon threads, so a hung
+    `urlopen` past the deadline is simply abandoned instead of blocking the build
+    (or interpreter exit).
+    """
+    results = {}
+    status = {}
+    lock = threading.Lock()
+    done = threading.Event()
+    pending = set(tasks.keys())
+    work = queue.SimpleQueue()
+    for item in tasks.items():
+        work.put(item)
+
+    def _worker():
+        while True:
+            try:
+                sid, fn = work.get_nowait()
+            except queue.Empty:
+                return
+            with lock:
+                if sid not in pending:
+                    return  # deadline passed: leave the rest of the queue alone
+            try:
+                value = fn()
+                err = None
+            except Exception as e:
+                value, err = None, e
+            with lock:
+                if sid not in pending:
+                    return  # already marked late
+                pending.discard(sid)
+                if err is None:
+                    results[sid] = value
+                else:
+                    status[sid] = f"获取失败：{type(err).__name__}: {err}"
+                if not pending:
+                    done.set()
+
+    if not tasks:
+        return results, status
+    for _ in range(max(1, min(max_workers, len(tasks)))):
+        threading.Thread(target=_worker, daemon=True).start()
+    done.wait(timeout=deadline)
+    with lock:
+        for sid in sorted(pending):
+            status[sid] = f"超时未完成（超过 {deadline:g} 秒时限）"
+        pending.clear()
+    return results, status
+
+
+def _lazy_stock_js(base_url: str) -> str:
+    if not base_url:
+        return ""
+    return (
+        "    var stockLoaded = {};\n"
+        "    function loadStock(code){\n"
+        "      if (stockLoaded[code]) return;\n"
+        "      stockLoaded[code] = true;\n"
+        "      var sec = document.getElementById('tab-stock-'+code);\n"
+        f"      var url = '{base_url}'+encodeURIComponent(code)+'?start='+sec.getAttribute('data-start')+'&end='+sec.getAttribute('data-end');\n"
+        "      fetch(url).then(function(r){ if(!r.ok) throw new Error('HTTP '+r.status); return r.json(); }).then(function(d){\n"
+        "        document.getElementById('stock-'+code+'-hot').innerHTML = d.hot;\n"
+        "        document.getElementById('stock-'+code+'-report').innerHTML = d.report;\n"
+        "      }).catch(function(e){\n"
+        "        stockLoaded[code] = false;\n"
+        "        document.getElementById('stock-'+code+'-hot').innerHTML = '<p class=\"status-note\">加载失败：'+e.message+'</p>';\n"
+        "      });\n"
+        "    }\n"
+    )
+
+
+def render_stock_items(items, empty_text: str) -> str:
+    if not items:
+        return f"<p>{empty_text}</p>\n"
+    out = []
+    for it in items:
+        t = (it.get("title") or "").replace("<", "&lt;").replace(">", "&gt;")
+        url = it.get("url") or ""
+        time_str = (it.get("date") or "")
+        move = ""
+        if it.get("align_weeks"):
+            # Pre/post-event returns from event alignment (see event_align.py)
+            w = it["align_weeks"]
+            pre = "—" if it.get("pre_ret") is None else f"{it['pre_ret']:+.2f}%"
+            post = "—" if it.get("post_ret") is None else f"{it['post_ret']:+.2f}%"
+            move = f"\n    <span class=\"meta\">事件前{w}周 {pre} · 事件后{w}周 {post}</span>"
+        out.append(
+            f"""
+  <div class=\"item\">\n
+    <a class=\"title-link\" href=\"{url}\" target=\"_blank\">{t}</a>
+    <span class=\"meta\">{time_str}</span>{move}
+    <a class=\"link\" href=\"{url}\" target=\"_blank\">原文链接</a>
+  </div>
+"""
         )
-    # classic (existing styles)
+    return "".join(out)
+
+
+def render_sparkline(values, width: int = 160, height: int = 28) -> str:
+    """Inline SVG polyline of a daily series (max scaled to the full height)."""
+    n = len(values)
+    if n == 0:
+        return ""
+    peak = max(max(values), 1)
+    step = width / max(n - 1, 1)
+    pts = " ".join(f"{i * step:.1f},{height - 1 - (v / peak) * (height - 2):.1f}" for i, v in enumerate(values))
     return (
-        "body { font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, 'Noto Sans', 'PingFang SC', 'Microsoft YaHei', sans-serif; margin: 20px; }\n"
-        "h1 { font-size: 20px; margin-bottom: 12px; }\n"
-        ".tabs { margin-bottom: 12px; }\n"
-        ".tab-btn { display: inline-block; padding: 6px 10px; margin-right: 8px; border: 1px solid #e5e7eb; border-radius: 6px; cursor: pointer; background: #f9fafb; }\n"
-        ".tab-btn.active { background: #e5e7eb; }\n"
-        ".item { border: 1px solid #e5e7eb; border-radius: 8px; padding: 12px; margin-bottom: 10px; }\n"
-        ".title-link { color: #0366d6; font-weight: 600; display: inline-block; text-decoration:none;}\n"
-        ".meta { color: #6b7280; font-size: 12px; margin-left: 8px; }\n"
-        ".link { display: block; margin-top: 8px; font-size: 12px; color: #374151; }\n"
-        ".subtabs { margin-bottom: 8px; }\n"
-        ".sub-btn { display: inline-block; padding: 4px 8px; margin-right: 6px; border: 1px solid #e5e7eb; border-radius: 6px; cursor: pointer; background: #fff; }\n"
-        ".sub-btn.active { background: #e5e7eb; }\n"
+        f"<svg class=\"spark\" width=\"{width}\" height=\"{height}\" viewBox=\"0 0 {width} {height}\">"
+        f"<polyline fill=\"none\" stroke=\"currentColor\" stroke-width=\"1.5\" points=\"{pts}\" /></svg>"
     )
 
-def build_html_combined(domestic_items, international_items, industry_reports, stock_sections, theme: str = "classic", page_title: str = None):
+
+def render_trends(trends) -> str:
+    """Trend tab body: per source, one row per keyword with a sparkline, total and peak day."""
+    days = range_planner.day_range(trends["start"], trends["end"])
+    out = [f"<p class=\"meta\">{trends['start']} 至 {trends['end']}，共 {len(days)} 天；每日提及该关键词的条目数。</p>\n"]
+    for source, (counts, totals, filled) in trends["sources"].items():
+        label = keyword_trends.SOURCE_LABELS.get(source, source)
+        out.append(f"<h3>{label} <span class=\"meta\">已统计 {int(filled.sum())}/{len(days)} 天，条目 {int(totals.sum())}</span></h3>\n")
+        out.append("<table class=\"trend-table\">\n<tr><th>关键词</th><th>走势</th><th>合计</th><th>峰值日</th></tr>\n")
+        for j, kw in enumerate(trends["keywords"]):
+            col = counts[:, j]
+            total = int(col.sum())
+            peak = f"{days[int(col.argmax())]}（{int(col.max())}）" if total else "—"
+            out.append(f"<tr><td>{kw}</td><td>{render_sparkline(col.tolist())}</td><td>{total}</td><td>{peak}</td></tr>\n")
+        out.append("</table>\n")
+    return "".join(out)
+
+
+BASE_SECTIONS = ("domestic", "international", "industry")
+
+
+def build_html_combined(domestic_items, international_items, industry_reports, stock_sections, theme: str = "classic", page_title: str = None, section_status: dict = None, lazy_stock_url: str = None, assets: dict = None, base_sections=BASE_SECTIONS, trends: dict = None):
+    """Render the combined page.
+
+    `section_status` optionally maps a section id (`domestic`, `international`,
+    `industry`, `stock-<code>`) to a note shown at the top of that tab, used to mark
+    sections that failed or missed the build deadline.
+
+    With `lazy_stock_url` set (served mode), stock tabs are rendered as placeholders
+    and filled from `<lazy_stock_url><code>?start=..&end=..` the first time they open.
+    `assets` (from `theme_assets.write_assets`) links shared CSS/JS instead of inlining.
+    `base_sections` limits which of the 国内/国际/行业研报 tabs are rendered (empty for a stocks-only page).
+    `trends` (from `keyword_trends.trend_data`) adds a 关键词趋势 tab with sparklines.
+    """
     dt = datetime.now().strftime("%Y-%m-%d")
+    section_status = section_status or {}
+
+    def render_status(section_id):
+        note = section_status.get(section_id)
+        if not note:
+            return ""
+        note = note.replace("<", "&lt;").replace(">", "&gt;")
+        return f"<p class=\"status-note\">⚠ 本栏目数据不完整：{note}</p>\n"
+
     title_text = page_title or f"综合页面 · 新闻（{dt}）"
     head = (
         "<!DOCTYPE html>\n"
@@ -100,44 +264,19 @@ def build_html_combined(domestic_items, international_items, industry_reports, s
         "  <meta charset=\"utf-8\" />\n"
         "  <meta name=\"viewport\" content=\"width=device-width, initial-scale=1\" />\n"
         "  <title>" + title_text + "</title>\n"
-        "  <style>\n"
-        + _theme_css(theme)
-        + "  </style>\n"
-        "  <script>\n"
-        "    function switchTab(tab){\n"
-        "      var ids = [""\n"
-    )
-    # list of tab ids
-    tab_ids = ["domestic", "international", "industry"] + [f"stock-{code}" for code in stock_sections.keys()]
-    head += ",".join([f"'tab-{tid}'" for tid in tab_ids]) + "]";
-    head += (
-        ";\n"
-        "      for (var i=0;i<ids.length;i++){\n"
-        "        var el = document.getElementById(ids[i]);\n"
-        "        var btn = document.getElementById('btn-'+ids[i]);\n"
-        "        if (ids[i] === 'tab-'+tab){ el.style.display='block'; if(btn) btn.classList.add('active'); } else { el.style.display='none'; if(btn) btn.classList.remove('active'); }\n"
-        "      }\n"
-        "    }\n"
-        "    function switchStockTab(code, sub){\n"
-        "      var hot = document.getElementById('stock-'+code+'-hot');\n"
-        "      var rep = document.getElementById('stock-'+code+'-report');\n"
-        "      var bhot = document.getElementById('btn-stock-'+code+'-hot');\n"
-        "      var brep = document.getElementById('btn-stock-'+code+'-report');\n"
-        "      if (sub==='hot'){ hot.style.display='block'; rep.style.display='none'; bhot.classList.add('active'); brep.classList.remove('active'); }\n"
-        "      else { hot.style.display='none'; rep.style.display='block'; bhot.classList.remove('active'); brep.classList.add('active'); }\n"
-        "    }\n"
-        "    window.addEventListener('DOMContentLoaded', function(){ switchTab('domestic'); });\n"
-        "  </script>\n"
-        "</head>\n"
+        + theme_assets.head_assets(theme, assets, extra_js=_lazy_stock_js(lazy_stock_url))
+        + "</head>\n"
         "<body>\n"
         "  <div class=\"grid-bg\"></div>\n"
         "  <div class=\"container\">\n"
         "  <h1 class=\"title\">" + title_text + "</h1>\n"
         "  <div class=\"tabs\">\n"
-        f"    <button id=\"btn-tab-domestic\" class=\"tab-btn\" onclick=\"switchTab('domestic')\">国内经济</button>\n"
-        f"    <button id=\"btn-tab-international\" class=\"tab-btn\" onclick=\"switchTab('international')\">国际经济</button>\n"
-        f"    <button id=\"btn-tab-industry\" class=\"tab-btn\" onclick=\"switchTab('industry')\">行业研报</button>\n"
     )
+    for section_id, label in (("domestic", "国内经济"), ("international", "国际经济"), ("industry", "行业研报")):
+        if section_id in base_sections:
+            head += f"    <button id=\"btn-tab-{section_id}\" class=\"tab-btn\" onclick=\"switchTab('{section_id}')\">{label}</button>\n"
+    if trends:
+        head += "    <button id=\"btn-tab-trends\" class=\"tab-btn\" onclick=\"switchTab('trends')\">关键词趋势</button>\n"
     # stock code buttons
     for code in stock_sections.keys():
         head += f"    <button id=\"btn-tab-stock-{code}\" class=\"tab-btn\" onclick=\"switchTab('stock-{code}')\">{code}</button>\n"
@@ -149,6 +288,7 @@ def build_html_combined(domestic_items, international_items, industry_reports, s
         out = []
         out.append(f"<div id=\"tab-{section_id}\" style=\"display:none\">\n")
         out.append(f"<h2>{title_label}</h2>\n")
+        out.append(render_status(section_id))
         if not items:
             out.append("<p>未获取到新闻。</p>\n")
         for it in items:
@@ -168,13 +308,16 @@ def build_html_combined(domestic_items, international_items, industry_reports, s
         return "".join(out)
 
     # domestic/international
-    parts.append(render_news_section(domestic_items, "domestic", "国内经济"))
-    parts.append(render_news_section(international_items, "international", "国际经济"))
+    if "domestic" in base_sections:
+        parts.append(render_news_section(domestic_items, "domestic", "国内经济"))
+    if "international" in base_sections:
+        parts.append(render_news_section(international_items, "international", "国际经济"))
 
     # industry reports
     out = []
     out.append("<div id=\"tab-industry\" style=\"display:none\">\n")
     out.append("<h2>行业研报</h2>\n")
+    out.append(render_status("industry"))
     if not industry_reports:
         out.append("<p>未获取到行业研报。</p>\n")
     else:
@@ -193,7 +336,13 @@ def build_html_combined(domestic_items, international_items, industry_reports, s
 """
             )
     out.append("</div>\n")
-    parts.append("".join(out))
+    if "industry" in base_sections:
+        parts.append("".join(out))
+
+    if trends:
+        parts.append("<div id=\"tab-trends\" style=\"display:none\">\n<h2>关键词趋势</h2>\n")
+        parts.append(render_trends(trends))
+        parts.append("</div>\n")
 
     # stock sections
     for code, sec in stock_sections.items():
@@ -208,49 +357,24 @@ def build_html_combined(domestic_items, international_items, industry_reports, s
                 range_label = f"（{rs} 至 {re}）"
         else:
             range_label = ""
-        parts.append(f"<div id=\"tab-stock-{code}\" style=\"display:none\">\n")
+        parts.append(f"<div id=\"tab-stock-{code}\" data-start=\"{rs}\" data-end=\"{re}\" style=\"display:none\">\n")
         parts.append(f"<h2 class=\"title\">个股 {code}{range_label}</h2>\n")
+        parts.append(render_status(f"stock-{code}"))
         parts.append(f"<div class=\"subtabs\">\n")
         parts.append(f"  <button id=\"btn-stock-{code}-hot\" class=\"sub-btn\" onclick=\"switchStockTab('{code}','hot')\">热点新闻</button>\n")
         parts.append(f"  <button id=\"btn-stock-{code}-report\" class=\"sub-btn\" onclick=\"switchStockTab('{code}','report')\">相关研报</button>\n")
         parts.append("</div>\n")
-        # hot
-        parts.append(f"<div id=\"stock-{code}-hot\" style=\"display:block\">\n")
-        if not hot:
-            parts.append("<p>暂无热点新闻。</p>\n")
+        # hot / reports (placeholders filled on first open when lazy)
+        if lazy_stock_url:
+            hot_html = rep_html = "<p>加载中…</p>\n"
         else:
-            for it in hot:
-                t = (it.get("title") or "").replace("<", "&lt;").replace(">", "&gt;")
-                url = it.get("url") or ""
-                time_str = (it.get("date") or "")
-                parts.append(
-                    f"""
-  <div class=\"item\">\n
-    <a class=\"title-link\" href=\"{url}\" target=\"_blank\">{t}</a>
-    <span class=\"meta\">{time_str}</span>
-    <a class=\"link\" href=\"{url}\" target=\"_blank\">原文链接</a>
-  </div>
-"""
-                )
+            hot_html = render_stock_items(hot, "暂无热点新闻。")
+            rep_html = render_stock_items(rep, "暂无相关研报。")
+        parts.append(f"<div id=\"stock-{code}-hot\" style=\"display:block\">\n")
+        parts.append(hot_html)
         parts.append("</div>\n")
-        # reports
         parts.append(f"<div id=\"stock-{code}-report\" style=\"display:none\">\n")
-        if not rep:
-            parts.append("<p>暂无相关研报。</p>\n")
-        else:
-            for it in rep:
-                t = (it.get("title") or "").replace("<", "&lt;").replace(">", "&gt;")
-                url = it.get("url") or ""
-                time_str = (it.get("date") or "")
-                parts.append(
-                    f"""
-  <div class=\"item\">\n
-    <a class=\"title-link\" href=\"{url}\" target=\"_blank\">{t}</a>
-    <span class=\"meta\">{time_str}</span>
-    <a class=\"link\" href=\"{url}\" target=\"_blank\">原文链接</a>
-  </div>
-"""
-                )
+        parts.append(rep_html)
         parts.append("</div>\n")
         parts.append("</div>\n")
 
@@ -259,9 +383,96 @@ def build_html_combined(domestic_items, international_items, industry_reports, s
     return "".join(parts)
 
 
+def page_title_for(start: str, end: str) -> str:
+    # Page title reflects date range
+    if start == end:
+        return f"综合页面 · 新闻（{start}）"
+    return f"综合页面 · 新闻（{start} 至 {end}）"
+
+
+def section_counts(domestic, international, industry_reports, stock_sections) -> dict:
+    return {
+        "domestic": len(domestic),
+        "international": len(international),
+        "industry": len(industry_reports),
+        "stocks": sum(len(sec["hot_news"]) + len(sec["related_reports"]) for sec in stock_sections.values()),
+    }
+
+
+def write_page(out_path: str, html: str, append_ts: bool = True, start: str = None, end: str = None,
+               codes=None, counts: dict = None, theme: str = "classic") -> str:
+    """Write a page (default dir `Data/`, optional timestamp suffix) and record it in the archive manifest."""
+    # Determine target directory (default to Data/ when not specified)
+    out_dir = os.path.dirname(out_path) or "Data"
+    os.makedirs(out_dir, exist_ok=True)
+
+    # Build timestamped output filename if enabled
+    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    base_name = os.path.basename(out_path)
+    name = base_name[: -len(".html")] if base_name.lower().endswith(".html") else base_name
+    if append_ts:
+        file_name = f"{name}_{ts}.html"
+    else:
+        file_name = base_name
+
+    out_actual = os.path.join(out_dir, file_name)
+
+    with open(out_actual, "w", encoding="utf-8") as f:
+        f.write(html)
+    page_archive.record_page(out_dir, out_actual, html, name, start, end, codes, counts or {}, theme=theme)
+    return out_actual
+
+
+def parse_output_spec(spec: str, defaults: dict) -> dict:
+    """`out.html[:start=..][:end=..][:codes=a,b][:theme=..][:sections=all|stocks]` -> output dict.
+
+    Unset keys fall back to `defaults` (the primary output); `start` alone implies `end=start`.
+    """
+    tokens = spec.split(":")
+    out = {"out": tokens[0], "start": defaults["start"], "end": defaults["end"], "codes": list(defaults["codes"]),
+           "theme": defaults["theme"], "base": True, "stock_ranges": {}}
+    seen = set()
+    for tok in tokens[1:]:
+        key, sep, value = tok.partition("=")
+        if not sep:
+            raise ValueError(f"bad output option {tok!r} in {spec!r}")
+        key, value = key.strip(), value.strip()
+        if key in ("start", "end", "theme"):
+            out[key] = value
+        elif key == "codes":
+            out["codes"] = [c.strip() for c in value.split(",") if c.strip()]
+        elif key == "sections":
+            if value not in ("all", "stocks"):
+                raise ValueError(f"sections must be all or stocks, got {value!r}")
+            out["base"] = value == "all"
+        else:
+            raise ValueError(f"unknown output option {key!r} in {spec!r}")
+        seen.add(key)
+    if "start" in seen and "end" not in seen:
+        out["end"] = out["start"]
+    return out
+
+
+def merge_ranges(ranges):
+    """Merge inclusive YYYY-MM-DD ranges that overlap or touch; returns them newest first."""
+    merged = []
+    for s, e in sorted(ranges):
+        if merged:
+            prev_end = datetime.strptime(merged[-1][1], "%Y-%m-%d") + timedelta(days=1)
+            if s <= prev_end.strftime("%Y-%m-%d"):
+                merged[-1][1] = max(merged[-1][1], e)
+                continue
+        merged.append([s, e])
+    return [(s, e) for s, e in reversed(merged)]
+
+
+def slice_items(items, date_of, start: str, end: str):
+    return [it for it in items if start <= (date_of(it) or "")[:10] <= end]
+
+
 def main():
     if len(sys.argv) < 2:
-        print("Usage: python3 scripts/build_combined_news.py <out.html> [--codes code1,code2] [--start YYYY-MM-DD] [--end YYYY-MM-DD] [--stock-start YYYY-MM-DD] [--stock-end YYYY-MM-DD] [--code-range code:YYYY-MM-DD:YYYY-MM-DD] [--theme classic|neon|glass|terminal] [--no-ts]")
+        print("Usage: python3 scripts/build_combined_news.py <out.html> [--codes code1,code2] [--start YYYY-MM-DD] [--end YYYY-MM-DD] [--stock-start YYYY-MM-DD] [--stock-end YYYY-MM-DD] [--code-range code:YYYY-MM-DD:YYYY-MM-DD] [--theme classic|neon|glass|terminal] [--deadline SECONDS] [--refresh] [--export DIR] [--align-weeks N] [--bar-store PATH] [--trends DAYS] [--keywords kw1,kw2] [--standalone] [--output out.html[:start=..][:end=..][:codes=..][:theme=..][:sections=all|stocks]]... [--no-ts]")
         print("Example: python3 scripts/build_combined_news.py combined_today.html --codes 688111,HK2097 --start 2025-12-01 --end 2026-01-12")
         sys.exit(1)
     out_path = sys.argv[1]
@@ -273,6 +484,15 @@ def main():
     stock_start = None
     stock_end = None
     code_ranges = {}
+    deadline = None
+    refresh = False
+    export_root = None
+    align_weeks = 0
+    bar_store_path = None
+    standalone = False
+    output_specs = []
+    trend_days = 0
+    trend_keywords = list(keyword_trends.DEFAULT_KEYWORDS)
     # parse args
     i = 2
     while i < len(sys.argv):
@@ -310,76 +530,172 @@ def main():
             theme = sys.argv[i + 1].strip()
             i += 2
             continue
+        if arg == "--deadline" and i + 1 < len(sys.argv):
+            # Overall time budget in seconds; unfinished sections are rendered as incomplete
+            deadline = float(sys.argv[i + 1].strip())
+            i += 2
+            continue
+        if arg == "--refresh":
+            # Ignore materialized day partitions and refetch the whole range
+            refresh = True
+            i += 1
+            continue
+        if arg == "--export" and i + 1 < len(sys.argv):
+            # Also write normalized items as a source/date partitioned dataset
+            export_root = sys.argv[i + 1].strip()
+            i += 2
+            continue
+        if arg == "--align-weeks" and i + 1 < len(sys.argv):
+            # Annotate stock items with pre/post-event returns over N weekly bars
+            align_weeks = int(sys.argv[i + 1].strip())
+            i += 2
+            continue
+        if arg == "--bar-store" and i + 1 < len(sys.argv):
+            bar_store_path = sys.argv[i + 1].strip()
+            i += 2
+            continue
+        if arg == "--output" and i + 1 < len(sys.argv):
+            # Extra page from the same fetch pass: out.html[:start=..][:end=..][:codes=a,b][:theme=..][:sections=all|stocks]
+            output_specs.append(sys.argv[i + 1].strip())
+            i += 2
+            continue
+        if arg == "--trends" and i + 1 < len(sys.argv):
+            # Add a keyword trend tab over the N days ending at --end (read from the stored rollups)
+            trend_days = int(sys.argv[i + 1].strip())
+            i += 2
+            continue
+        if arg == "--keywords" and i + 1 < len(sys.argv):
+            trend_keywords = [k.strip() for k in sys.argv[i + 1].split(",") if k.strip()]
+            i += 2
+            continue
+        if arg == "--standalone":
+            # Inline CSS/JS instead of linking the shared assets/ files
+            standalone = True
+            i += 1
+            continue
         if arg == "--no-ts":
             append_ts = False
             i += 1
             continue
         i += 1
 
+    outputs = [{"out": out_path, "start": start, "end": end, "codes": codes, "theme": theme, "base": True, "stock_ranges": {}}]
+    for code in codes:
+        # Resolve range for this code
+        if code in code_ranges:
+            outputs[0]["stock_ranges"][code] = code_ranges[code]
+        elif stock_start or stock_end:
+            outputs[0]["stock_ranges"][code] = (stock_start or start, stock_end or (stock_start or start))
+    try:
+        outputs += [parse_output_spec(spec, outputs[0]) for spec in output_specs]
+    except ValueError as e:
+        print(f"[error] --output: {e}")
+        sys.exit(1)
+    for o in outputs:
+        for code in o["codes"]:
+            o["stock_ranges"].setdefault(code, (o["start"], o["end"]))
+
     # load modules
     east = _load_module("scripts/fetch_eastmoney_cgnjj.py")
     ths = _load_module("scripts/fetch_10jqka_stock_news.py")
 
-    # fetch base sections
-    # Use date range if provided
-    domestic = east.get_news_by_date_range(350, start, end)
-    international = east.get_news_by_date_range(351, start, end)
-    industry_reports = east.fetch_industry_reports(begin=start, end=end)
+    # One fetch pass for every output: base sections over the merged date ranges, each stock over the union of its ranges
+    base_ranges = merge_ranges([(o["start"], o["end"]) for o in outputs if o["base"]])
+    tasks = {}
+    for rs, re in base_ranges:
+        tasks[("domestic", rs, re)] = (lambda s=rs, e=re: fetch_column(east, 350, s, e, refresh))
+        tasks[("international", rs, re)] = (lambda s=rs, e=re: fetch_column(east, 351, s, e, refresh))
+        tasks[("industry", rs, re)] = (lambda s=rs, e=re: fetch_industry(east, s, e, refresh))
+    stock_union = {}
+    for o in outputs:
+        for code, (rs, re) in o["stock_ranges"].items():
+            prev = stock_union.get(code)
+            stock_union[code] = (min(prev[0], rs), max(prev[1], re)) if prev else (rs, re)
+    for code, (rs, re) in stock_union.items():
+        tasks[(f"stock-{code}", rs, re)] = (lambda c=code, s=rs, e=re: fetch_stock(ths, c, s, e, refresh))
 
-    # fetch stocks
-    stock_sections = {}
-    for code in codes:
-        # Resolve range for this code
-        rs, re = None, None
-        if code in code_ranges:
-            rs, re = code_ranges[code]
-        elif stock_start or stock_end:
-            rs = stock_start or start
-            re = stock_end or (stock_start or start)
-        else:
-            rs, re = start, end
+    t0 = time.time()
+    results, task_status = run_with_deadline(tasks, deadline)
+    for (sid, rs, re), note in task_status.items():
+        print(f"[warn] {sid} ({rs} 至 {re}): {note}")
 
-        if code.upper().startswith("HK"):
-            hot_news = [it for it in ths.fetch_hk_news_json(code, page=1, limit=100) if it.get("date") and in_range(it["date"], rs, re)]
-            related_reports = []
-        else:
-            url = f"https://stockpage.10jqka.com.cn/ajax/code/{code}/type/news/"
-            # use module fetch_text to honor headers
-            html = ths.fetch_text(url, referer=f"https://stockpage.10jqka.com.cn/{code}/news/", encoding="gbk")
-            news_items, report_items = ths.parse_ashare_news_and_reports(html)
-            hot_news = [it for it in news_items if it.get("date") and in_range(it["date"], rs, re)]
-            related_reports = [it for it in report_items if it.get("date") and in_range(it["date"], rs, re)]
-        stock_sections[code] = {"hot_news": hot_news, "related_reports": related_reports, "range_start": rs, "range_end": re}
+    # base_ranges are newest first and disjoint, so concatenation keeps items newest first
+    base_items = {sid: [] for sid in BASE_SECTIONS}
+    for rs, re in base_ranges:
+        for sid in BASE_SECTIONS:
+            base_items[sid].extend(results.get((sid, rs, re)) or [])
+    all_stocks = {}
+    for code, (rs, re) in stock_union.items():
+        sec = results.get((f"stock-{code}", rs, re)) or {"hot_news": [], "related_reports": []}
+        all_stocks[code] = {"hot_news": sec["hot_news"], "related_reports": sec["related_reports"]}
 
-    # Page title reflects date range
-    if start == end:
-        page_title = f"综合页面 · 新闻（{start}）"
-    else:
-        page_title = f"综合页面 · 新闻（{start} 至 {end}）"
+    if align_weeks and all_stocks:
+        # Weekly bars come from the local store filled by tushare_ks_weekly_10w.py (no API calls here)
+        import event_align
+        from bar_store import BarStore
 
-    html = build_html_combined(domestic, international, industry_reports, stock_sections, theme=theme, page_title=page_title)
+        store = BarStore(bar_store_path)
+        ts_codes = {event_align.to_ts_code(c) for c in all_stocks} - {None}
+        bars = store.read_many(sorted(ts_codes), "W")
+        store.close()
+        n_events = event_align.annotate_stock_sections(all_stocks, bars, weeks=align_weeks)
+        print(f"Aligned {n_events} stock events with {len(bars)} weekly bars")
 
-    # Determine target directory (default to Data/ when not specified)
-    out_dir = os.path.dirname(out_path) or "Data"
-    os.makedirs(out_dir, exist_ok=True)
+    if export_root:
+        rows = export_items.normalize_items(base_items["domestic"], base_items["international"], base_items["industry"], all_stocks)
+        n_parts = export_items.export_items(rows, export_root)
+        print(f"Exported {len(rows)} items in {n_parts} partitions to {export_root} ({export_items.default_format()})")
 
-    # Build timestamped output filename if enabled
-    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-    base_name = os.path.basename(out_path)
-    if append_ts:
-        if base_name.lower().endswith(".html"):
-            base = base_name[: -len(".html")]
-            file_name = f"{base}_{ts}.html"
-        else:
-            file_name = f"{base_name}_{ts}.html"
-    else:
-        file_name = base_name
+    date_of = {
+        "domestic": lambda it: it.get("showTime"),
+        "international": lambda it: it.get("showTime"),
+        "industry": lambda it: it.get("publishDate"),
+    }
+    for o in outputs:
+        section_status = {}
+        sliced = {}
+        for sid in BASE_SECTIONS:
+            sliced[sid] = slice_items(base_items[sid], date_of[sid], o["start"], o["end"]) if o["base"] else []
+            for (tsid, rs, re), note in task_status.items():
+                if o["base"] and tsid == sid and rs <= o["end"] and o["start"] <= re:
+                    section_status[sid] = note
+        if o["base"]:
+            for rs, re in base_ranges:
+                add_coverage_status(section_status, {sid: results.get((sid, rs, re)) for sid in BASE_SECTIONS},
+                                    o["start"], o["end"])
+        stock_sections = {}
+        for code in o["codes"]:
+            rs, re = o["stock_ranges"][code]
+            sec = all_stocks[code]
+            stock_sections[code] = {
+                "hot_news": slice_items(sec["hot_news"], lambda it: it.get("date"), rs, re),
+                "related_reports": slice_items(sec["related_reports"], lambda it: it.get("date"), rs, re),
+                "range_start": rs,
+                "range_end": re,
+            }
+            note = task_status.get((f"stock-{code}",) + stock_union[code])
+            if note:
+                section_status[f"stock-{code}"] = note
 
-    out_actual = os.path.join(out_dir, file_name)
+        trends = None
+        if trend_days and o["base"]:
+            t_end = datetime.strptime(o["end"], "%Y-%m-%d")
+            t_start = (t_end - timedelta(days=trend_days - 1)).strftime("%Y-%m-%d")
+            trends = keyword_trends.trend_data(t_start, o["end"], trend_keywords)
+            if trends is None:
+                print("[warn] --trends needs numpy; trend tab skipped")
 
-    with open(out_actual, "w", encoding="utf-8") as f:
-        f.write(html)
-    print(f"Wrote combined HTML to {out_actual} with {len(domestic)} domestic, {len(international)} international, {len(industry_reports)} industry, and {len(stock_sections)} stocks (theme={theme})")
+        # Pages in one directory share the hashed theme CSS/JS under <dir>/assets/
+        assets = None if standalone else theme_assets.write_assets(os.path.dirname(o["out"]) or "Data", o["theme"])
+        html = build_html_combined(
+            sliced["domestic"], sliced["international"], sliced["industry"], stock_sections,
+            theme=o["theme"], page_title=page_title_for(o["start"], o["end"]), section_status=section_status,
+            assets=assets, base_sections=BASE_SECTIONS if o["base"] else (), trends=trends,
+        )
+        counts = section_counts(sliced["domestic"], sliced["international"], sliced["industry"], stock_sections)
+        out_actual = write_page(o["out"], html, append_ts=append_ts, start=o["start"], end=o["end"], codes=o["codes"], counts=counts, theme=o["theme"])
+        print(f"Wrote combined HTML to {out_actual} with {counts['domestic']} domestic, {counts['international']} international, {counts['industry']} industry, and {len(stock_sections)} stocks (theme={o['theme']}), {len(section_status)} incomplete sections")
+    print(f"Built {len(outputs)} page(s) from {len(tasks)} fetch tasks in {time.time() - t0:.1f}s")
 
 
 if __name__ == "__main__":
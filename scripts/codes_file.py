@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+"""Stock code lists from the command line and/or a codes file.
+
+A codes file holds comma- or newline-separated codes; `#` starts a comment.
+"""
+
+
+def read_codes(codes_arg: str = None, codes_file: str = None):
+    """Codes from `--codes` then `--codes-file`, deduplicated in first-seen order."""
+    codes = []
+    if codes_arg:
+        codes += [c.strip() for c in codes_arg.split(",") if c.strip()]
+    if codes_file:
+        with open(codes_file, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.split("#", 1)[0].strip()
+                if line:
+                    codes += [c.strip() for c in line.split(",") if c.strip()]
+    return list(dict.fromkeys(codes))
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""Align stock news/report events with weekly bars and compute pre/post-event returns.
+
+Each event date is mapped to the first weekly bar dated on or after it (the bar of
+the trading week containing the event) with `np.searchsorted` on the code's sorted
+bar dates, so the cost is one vectorized join per code rather than a loop over
+events x bars. Returns are measured against the close of the week before the event:
+
+  pre  = close[i-1] / close[i-1-w] - 1   (the w weeks leading into the event week)
+  post = close[i+w-1] / close[i-1] - 1   (the event week and the following w-1 weeks)
+"""
+import numpy as np
+
+
+def to_ts_code(code: str):
+    """Map a 10jqka code (`688111`, `HK2097`) to its Tushare `ts_code`, or None if it is not a stock code."""
+    c = code.strip().upper()
+    if c.startswith("HK"):
+        return f"{int(c[2:]):05d}.HK" if c[2:].isdigit() else None
+    if not (c.isdigit() and len(c) == 6):
+        return None
+    # Beijing Stock Exchange: 4xxxxx/8xxxxx and the newer 92xxxx
+    if c[:1] in ("4", "8") or c.startswith("92"):
+        return f"{c}.BJ"
+    # Shanghai: 6xxxxx/9xxxxx shares and 5xxxxx funds/ETFs (e.g. 510300)
+    if c[:1] in ("5", "6", "9"):
+        return f"{c}.SH"
+    return f"{c}.SZ"
+
+
+def _yyyymmdd_to_days(v):
+    """Vectorized int YYYYMMDD -> datetime64[D]."""
+    y = v // 10000
+    m = (v // 100) % 100
+    d = v % 100
+    months = (y - 1970) * 12 + (m - 1)
+    return months.astype("datetime64[M]").astype("datetime64[D]") + (d - 1).astype("timedelta64[D]")
+
+
+def align_events(event_codes, event_dates, bars, weeks: int = 1):
+    """Return (pre, post, bar_date) arrays aligned with the input events.
+
+    `event_codes`/`event_dates` are parallel sequences (ts_code, YYYY-MM-DD); `bars`
+    is a long frame with ts_code, trade_date (YYYYMMDD) and close. Events without a
+    usable bar window get NaN returns and an empty bar date.
+    """
+    codes = np.asarray(event_codes, dtype=object)
+    dates = np.array([str(d)[:10] for d in event_dates], dtype="datetime64[D]")
+    n = len(codes)
+    pre = np.full(n, np.nan)
+    post = np.full(n, np.nan)
+    bar_date = np.full(n, "", dtype=object)
+    if n == 0 or bars is None or len(bars) == 0:
+        return pre, post, bar_date
+
+    bars = bars.sort_values(["ts_code", "trade_date"], kind="mergesort")
+    bar_codes = bars["ts_code"].to_numpy()
+    bar_days = _yyyymmdd_to_days(bars["trade_date"].astype(str).str.slice(0, 8).astype("int64").to_numpy())
+    bar_close = bars["close"].to_numpy(dtype="float64")
+    # Contiguous [lo, hi) slice of the sorted bars for each code
+    uniq, starts = np.unique(bar_codes, return_index=True)
+    ends = np.append(starts[1:], len(bar_codes))
+    spans = dict(zip(uniq, zip(starts, ends)))
+
+    order = np.argsort(codes, kind="mergesort")
+    sorted_codes = codes[order]
+    group_starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    group_ends = np.append(group_starts[1:], n)
+    for gs, ge in zip(group_starts, group_ends):
+        span = spans.get(sorted_codes[gs])
+        if span is None:
+            continue
+        lo, hi = span
+        days = bar_days[lo:hi]
+        close = bar_close[lo:hi]
+        ev = order[gs:ge]
+        idx = np.searchsorted(days, dates[ev], side="left")
+        m = len(days)
+        base_i = idx - 1
+        pre_i = base_i - weeks
+        post_i = idx + weeks - 1
+        ok_base = (base_i >= 0) & (idx < m)
+        ok_pre = ok_base & (pre_i >= 0)
+        ok_post = ok_base & (post_i < m)
+        base = np.where(ok_base, close[np.clip(base_i, 0, m - 1)], np.nan)
+        pre[ev] = np.where(ok_pre, base / close[np.clip(pre_i, 0, m - 1)] - 1, np.nan)
+        post[ev] = np.where(ok_post, close[np.clip(post_i, 0, m - 1)] / base - 1, np.nan)
+        in_range = idx < m
+        bar_date[ev[in_range]] = days[idx[in_range]].astype(str)
+    return pre, post, bar_date
+
+
+def annotate_stock_sections(stock_sections, bars, weeks: int = 1):
+    """Attach `pre_ret`/`post_ret` (percent) and `bar_date` to every stock news/report item in place.
+
+    Codes without a Tushare mapping are skipped.
+    """
+    items, ev_codes, ev_dates = [], [], []
+    for code, sec in stock_sections.items():
+        ts_code = to_ts_code(code)
+        if ts_code is None:
+            continue
+        for key in ("hot_news", "related_reports"):
+            for it in sec.get(key) or []:
+                if it.get("date"):
+                    items.append(it)
+                    ev_codes.append(ts_code)
+                    ev_dates.append(it["date"])
+    pre, post, bar_date = align_events(ev_codes, ev_dates, bars, weeks=weeks)
+    for it, p, q, b in zip(items, pre, post, bar_date):
+        it["pre_ret"] = None if np.isnan(p) else round(float(p) * 100, 2)
+        it["post_ret"] = None if np.isnan(q) else round(float(q) * 100, 2)
+        it["bar_date"] = b
+        it["align_weeks"] = weeks
+    return len(items)
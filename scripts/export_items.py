@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""Export fetched items as a partitioned dataset for downstream analytics.
+
+Layout: `<root>/source=<source>/date=<YYYY-MM-DD>/data.<ext>`, one file per
+(source, day), rewritten atomically on each export. With `pyarrow` installed the
+files are uncompressed Arrow IPC (`.arrow`) and are read through `pa.memory_map`;
+otherwise they are gzip JSONL (`.jsonl.gz`) read as a stream. Readers prune on the
+`source`/`date` partition keys before opening any file.
+
+Usage:
+  python3 scripts/export_items.py read <root> [--source news-350,industry] [--start YYYY-MM-DD] [--end YYYY-MM-DD] [--count]
+"""
+import argparse
+import gzip
+import json
+import os
+import re
+import sys
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+
+COLUMNS = ["source", "date", "time", "code", "kind", "title", "url", "summary", "industry"]
+_DATE_RE = re.compile(r"^\s*(\d{4})[-/.](\d{1,2})[-/.](\d{1,2})")
+
+
+def normalize_date(value: str) -> str:
+    """Leading date of a timestamp as `YYYY-MM-DD` (accepts `-`, `/` or `.` separators); "" when there is none."""
+    m = _DATE_RE.match(value or "")
+    if not m:
+        return ""
+    y, mo, d = (int(g) for g in m.groups())
+    if not (1 <= mo <= 12 and 1 <= d <= 31):
+        return ""
+    return f"{y:04d}-{mo:02d}-{d:02d}"
+
+
+def normalize_items(domestic, international, industry_reports, stock_sections):
+    """Flatten the builder's sections into rows with the fixed `COLUMNS` schema."""
+    rows = []
+
+    def _row(source, time_str, title, url, code="", kind="", summary="", industry=""):
+        time_str = time_str or ""
+        rows.append({
+            "source": source,
+            "date": normalize_date(time_str),
+            "time": time_str,
+            "code": code,
+            "kind": kind,
+            "title": title or "",
+            "url": url or "",
+            "summary": summary or "",
+            "industry": industry or "",
+        })
+
+    for source, items in (("news-350", domestic), ("news-351", international)):
+        for it in items or []:
+            _row(source, it.get("showTime"), it.get("title"), it.get("url"), summary=it.get("summary"))
+    for it in industry_reports or []:
+        _row("industry", it.get("publishDate"), it.get("title"), it.get("link"), industry=it.get("industryName"))
+    for code, sec in (stock_sections or {}).items():
+        for kind, key in (("hot", "hot_news"), ("report", "related_reports")):
+            for it in sec.get(key) or []:
+                _row(f"stock-{code}", it.get("date"), it.get("title"), it.get("url"), code=code, kind=kind)
+    # Rows without a parseable date have no partition to live in
+    return [r for r in rows if r["date"]]
+
+
+def default_format() -> str:
+    return "arrow" if pa is not None else "jsonl"
+
+
+def _partition_dir(root: str, source: str, day: str) -> str:
+    return os.path.join(root, f"source={source}", f"date={day}")
+
+
+def export_items(rows, root: str, fmt: str = None):
+    """Write rows partitioned by (source, date); returns the number of partitions written."""
+    fmt = fmt or default_format()
+    if fmt == "arrow" and pa is None:
+        raise RuntimeError("pyarrow is not installed; use fmt='jsonl'")
+    parts = {}
+    for r in rows:
+        parts.setdefault((r["source"], r["date"]), []).append(r)
+    for (source, day), items in parts.items():
+        pdir = _partition_dir(root, source, day)
+        os.makedirs(pdir, exist_ok=True)
+        if fmt == "arrow":
+            path = os.path.join(pdir, "data.arrow")
+            table = pa.table({c: [r.get(c, "") for r in items] for c in COLUMNS})
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with pa.OSFile(tmp, "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+        else:
+            path = os.path.join(pdir, "data.jsonl.gz")
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with gzip.open(tmp, "wt", encoding="utf-8") as f:
+                for r in items:
+                    f.write(json.dumps({c: r.get(c, "") for c in COLUMNS}, ensure_ascii=False) + "\n")
+        os.replace(tmp, path)
+        # Drop a stale file in the other format so readers never see both
+        for other in ("data.arrow", "data.jsonl.gz"):
+            if other != os.path.basename(path) and os.path.exists(os.path.join(pdir, other)):
+                os.remove(os.path.join(pdir, other))
+    return len(parts)
+
+
+def _partitions(root: str, sources=None, start: str = None, end: str = None):
+    """Yield (source, day, path) for partitions matching the predicates, oldest day first."""
+    if not os.path.isdir(root):
+        return
+    wanted = set(sources) if sources else None
+    for sdir in sorted(os.listdir(root)):
+        if not sdir.startswith("source="):
+            continue
+        source = sdir[len("source="):]
+        if wanted is not None and source not in wanted:
+            continue
+        for ddir in sorted(os.listdir(os.path.join(root, sdir))):
+            if not ddir.startswith("date="):
+                continue
+            day = ddir[len("date="):]
+            if (start and day < start) or (end and day > end):
+                continue
+            pdir = os.path.join(root, sdir, ddir)
+            for name in ("data.arrow", "data.jsonl.gz"):
+                path = os.path.join(pdir, name)
+                if os.path.exists(path):
+                    yield source, day, path
+                    break
+
+
+def _iter_jsonl(path: str):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def iter_items(root: str, sources=None, start: str = None, end: str = None):
+    """Stream rows (dicts) from matching partitions without loading the whole history."""
+    for _, _, path in _partitions(root, sources, start, end):
+        if path.endswith(".arrow"):
+            if pa is None:
+                raise RuntimeError(f"pyarrow is required to read {path}")
+            with pa.memory_map(path, "r") as source:
+                yield from pa.ipc.open_file(source).read_all().to_pylist()
+        else:
+            yield from _iter_jsonl(path)
+
+
+def read_table(root: str, sources=None, start: str = None, end: str = None):
+    """Return matching partitions as one `pyarrow.Table` (memory-mapped Arrow partitions are zero-copy)."""
+    if pa is None:
+        raise RuntimeError("pyarrow is not installed; use iter_items()")
+    tables = []
+    for _, _, path in _partitions(root, sources, start, end):
+        if path.endswith(".arrow"):
+            tables.append(pa.ipc.open_file(pa.memory_map(path, "r")).read_all())
+        else:
+            rows = list(_iter_jsonl(path))
+            tables.append(pa.table({c: [r.get(c, "") for r in rows] for c in COLUMNS}))
+    if not tables:
+        return pa.table({c: pa.array([], type=pa.string()) for c in COLUMNS})
+    return pa.concat_tables(tables)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read the partitioned item export")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    rd = sub.add_parser("read", help="Stream matching items as JSON lines")
+    rd.add_argument("root")
+    rd.add_argument("--source", default="", help="Comma-separated sources, e.g. news-350,industry,stock-688111")
+    rd.add_argument("--start", default=None)
+    rd.add_argument("--end", default=None)
+    rd.add_argument("--count", action="store_true", help="Only print the number of matching items")
+    args = parser.parse_args()
+
+    sources = [s.strip() for s in args.source.split(",") if s.strip()] or None
+    n = 0
+    for row in iter_items(args.root, sources, args.start, args.end):
+        n += 1
+        if not args.count:
+            sys.stdout.write(json.dumps(row, ensure_ascii=False) + "\n")
+    if args.count:
+        print(n)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,8 +6,14 @@ from datetime import datetime
 from urllib.request import Request, urlopen
 import os
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fetch_cache import cached_text
+
 
 UA = "Mozilla/5.0 (Macintosh; Intel Mac OS X) AppleWebKit/537.36 (KHTML, like Gecko) Chrome Safari"
+# Endpoint hosts; override (e.g. with a local stand-in server) via THS_STOCKPAGE_BASE / THS_BASIC_BASE
+STOCKPAGE_BASE = os.environ.get("THS_STOCKPAGE_BASE", "https://stockpage.10jqka.com.cn")
+BASIC_BASE = os.environ.get("THS_BASIC_BASE", "https://basic.10jqka.com.cn")
 
 
 def fetch_text(url: str, referer: str = None, encoding: str = "utf-8") -> str:
@@ -18,13 +24,18 @@ def fetch_text(url: str, referer: str = None, encoding: str = "utf-8") -> str:
     hx = os.environ.get("HEXIN_V")
     if hx:
         headers["hexin-v"] = hx
-    req = Request(url, headers=headers)
-    with urlopen(req, timeout=20) as resp:
-        data = resp.read()
-    try:
-        return data.decode(encoding, errors="ignore")
-    except Exception:
-        return data.decode("utf-8", errors="ignore")
+
+    def _fetch():
+        req = Request(url, headers=headers)
+        with urlopen(req, timeout=20) as resp:
+            data = resp.read()
+        try:
+            return data.decode(encoding, errors="ignore")
+        except Exception:
+            return data.decode("utf-8", errors="ignore")
+
+    # Do not cache empty bodies (blocked or failed requests)
+    return cached_text(f"{url}#{encoding}", _fetch, validate=lambda t: bool(t.strip()))
 
 
 def parse_ashare_news_and_reports(html: str):
@@ -76,8 +87,8 @@ def parse_ashare_news_and_reports(html: str):
 
 
 def fetch_hk_news_json(code: str, page: int = 1, limit: int = 50):
-    url = f"https://basic.10jqka.com.cn/basicapi/notice/news?type=hk&code={code}&current={page}&limit={limit}"
-    txt = fetch_text(url, referer=f"https://basic.10jqka.com.cn/176/{code}/news.html")
+    url = f"{BASIC_BASE}/basicapi/notice/news?type=hk&code={code}&current={page}&limit={limit}"
+    txt = fetch_text(url, referer=f"{BASIC_BASE}/176/{code}/news.html")
     try:
         obj = json.loads(txt)
     except Exception:
@@ -124,8 +135,8 @@ def main():
         out["related_reports"] = []
     else:
         # A股：使用 HTML 片段接口
-        url = f"https://stockpage.10jqka.com.cn/ajax/code/{code}/type/news/"
-        html = fetch_text(url, referer=f"https://stockpage.10jqka.com.cn/{code}/news/", encoding="gbk")
+        url = f"{STOCKPAGE_BASE}/ajax/code/{code}/type/news/"
+        html = fetch_text(url, referer=f"{STOCKPAGE_BASE}/{code}/news/", encoding="gbk")
         news_items, report_items = parse_ashare_news_and_reports(html)
         out["hot_news"] = [it for it in news_items if it.get("date") and in_range(it["date"], start, end)]
         out["related_reports"] = [it for it in report_items if it.get("date") and in_range(it["date"], start, end)]
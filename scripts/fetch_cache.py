@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""Shared fetch cache: in-process single-flight plus a file-locked on-disk cache.
+
+Identical concurrent requests inside one process share a single in-flight fetch.
+Across processes, the first one to take the per-key file lock fetches and writes
+the body; the others block on the lock and then reuse the fresh file.
+
+Environment:
+  NEWS_CACHE_DIR  cache directory (default `Data/.cache`)
+  NEWS_CACHE_TTL  seconds a cached body stays fresh (default 60; 0 disables the disk cache)
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import fcntl
+except ImportError:  # non-POSIX: fall back to single-flight only within a process
+    fcntl = None
+
+
+DEFAULT_CACHE_DIR = "Data/.cache"
+DEFAULT_TTL = 60
+
+
+class FileLock:
+    """Exclusive `flock` on the file at `path` plus a per-path thread lock, as a context manager.
+
+    Guards a read-modify-write shared by threads and processes; without fcntl only
+    the threads of one process are serialized.
+    """
+
+    _guard = threading.Lock()
+    _thread_locks = {}
+
+    def __init__(self, path: str):
+        self.path = path
+        with FileLock._guard:
+            self._tlock = FileLock._thread_locks.setdefault(os.path.abspath(path), threading.Lock())
+
+    def __enter__(self):
+        self._tlock.acquire()
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self.f = open(self.path, "a")
+            if fcntl is not None:
+                fcntl.flock(self.f.fileno(), fcntl.LOCK_EX)
+        except BaseException:
+            self._tlock.release()
+            raise
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self.f.fileno(), fcntl.LOCK_UN)
+            self.f.close()
+        finally:
+            self._tlock.release()
+
+    @classmethod
+    def _reset_after_fork(cls):
+        # A forked child must not inherit thread locks held by other parent threads
+        cls._guard = threading.Lock()
+        cls._thread_locks = {}
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=FileLock._reset_after_fork)
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one execution."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = {"event": threading.Event(), "value": None, "error": None}
+                self._calls[key] = call
+        if not leader:
+            call["event"].wait()
+            if call["error"] is not None:
+                raise call["error"]
+            return call["value"]
+        try:
+            call["value"] = fn()
+        except Exception as e:
+            call["error"] = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call["event"].set()
+        return call["value"]
+
+
+class FileCache:
+    """Text cache on disk, one file per key, guarded by an exclusive `flock`."""
+
+    def __init__(self, cache_dir: str = None, ttl: float = None):
+        self.cache_dir = cache_dir or os.environ.get("NEWS_CACHE_DIR") or DEFAULT_CACHE_DIR
+        if ttl is None:
+            ttl = float(os.environ.get("NEWS_CACHE_TTL", DEFAULT_TTL))
+        self.ttl = ttl
+
+    def _path(self, key: str) -> str:
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], digest + ".txt")
+
+    def _read_fresh(self, path: str):
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def get_or_fetch(self, key: str, fn, validate=None) -> str:
+        """Return the cached text for `key` or fetch it with `fn()`.
+
+        When `validate(text)` is false the fetched text is returned but not stored,
+        so error replies are never served to other processes.
+        """
+        if self.ttl <= 0:
+            return fn()
+        path = self._path(key)
+        text = self._read_fresh(path)
+        if text is not None:
+            return text
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".lock", "a") as lock_f:
+            if fcntl is not None:
+                fcntl.flock(lock_f.fileno(), fcntl.LOCK_EX)
+            try:
+                # Another process may have filled the entry while we waited for the lock
+                text = self._read_fresh(path)
+                if text is not None:
+                    return text
+                text = fn()
+                if validate is not None and not validate(text):
+                    return text
+                tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    f.write(text)
+                os.replace(tmp, path)
+                return text
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_f.fileno(), fcntl.LOCK_UN)
+
+
+    def prune(self, max_age: float = None) -> int:
+        """Delete entries (and their lock files) older than `max_age` seconds (default the TTL).
+
+        A lock file is only removed when no process holds it; at worst a racing
+        fetcher that opened the old lock file fetches once more.
+        """
+        max_age = self.ttl if max_age is None else max_age
+        if max_age <= 0 or not os.path.isdir(self.cache_dir):
+            return 0
+        cutoff = time.time() - max_age
+        removed = 0
+        for sub in os.listdir(self.cache_dir):
+            sdir = os.path.join(self.cache_dir, sub)
+            if not os.path.isdir(sdir):
+                continue
+            for name in os.listdir(sdir):
+                path = os.path.join(sdir, name)
+                try:
+                    if os.path.getmtime(path) >= cutoff:
+                        continue
+                    if name.endswith(".lock"):
+                        if not self._unlink_unlocked(path):
+                            continue
+                    else:
+                        os.remove(path)
+                    removed += 1
+                except OSError:
+                    continue
+        return removed
+
+    @staticmethod
+    def _unlink_unlocked(path: str) -> bool:
+        with open(path, "a") as f:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    return False  # in use
+            os.remove(path)
+        return True
+
+
+class LRUCache:
+    """Thread-safe in-memory LRU with a per-entry TTL; misses are single-flighted."""
+
+    def __init__(self, max_entries: int = 256, ttl: float = 300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._data = OrderedDict()
+        self._flight = SingleFlight()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (time.time() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def get_or_compute(self, key, fn):
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        def _compute():
+            cached = self.get(key)
+            if cached is not None:
+                return cached
+            result = fn()
+            self.put(key, result)
+            return result
+
+        return self._flight.do(key, _compute)
+
+
+_flight = SingleFlight()
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def _default_cache() -> FileCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = FileCache()
+            # Expired entries are only ever read by nobody; sweep them once per process
+            _cache.prune()
+        return _cache
+
+
+def cached_text(key: str, fn, validate=None) -> str:
+    """Return the text for `key`, fetching with `fn()` at most once across concurrent callers.
+
+    `validate(text)` decides whether a fetched body may be stored in the disk cache.
+    """
+    return _flight.do(key, lambda: _default_cache().get_or_fetch(key, fn, validate))
@@ -1,11 +1,17 @@
 #!/usr/bin/env python3
 import json
+import os
 import sys
 import time
 from datetime import datetime
 from urllib.parse import urlencode
 from urllib.request import Request, urlopen
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fetch_cache import cached_text
+from range_planner import Partial, next_day
+import theme_assets
+
 
 API_BASE = "https://np-listapi.eastmoney.com/comm/web/getNewsByColumns"
 DEFAULT_PARAMS = {
@@ -24,20 +30,29 @@ def fetch_page(page_index: int, column: int):
     params = DEFAULT_PARAMS.copy()
     params["page_index"] = page_index
     params["column"] = column
-    params["req_trace"] = int(time.time() * 1000)
-    url = API_BASE + "?" + urlencode(params)
-    req = Request(url, headers={
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X) AppleWebKit/537.36 (KHTML, like Gecko) Chrome Safari",
-        # Use a generic referer; endpoint works for both columns
-        "Referer": "https://finance.eastmoney.com/a/",
-    })
-    with urlopen(req, timeout=20) as resp:
-        data = resp.read()
+    # Cache key excludes the per-call req_trace so identical page requests coalesce
+    cache_key = API_BASE + "?" + urlencode(params)
+
+    def _fetch():
+        params["req_trace"] = int(time.time() * 1000)
+        url = API_BASE + "?" + urlencode(params)
+        req = Request(url, headers={
+            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X) AppleWebKit/537.36 (KHTML, like Gecko) Chrome Safari",
+            # Use a generic referer; endpoint works for both columns
+            "Referer": "https://finance.eastmoney.com/a/",
+        })
+        with urlopen(req, timeout=20) as resp:
+            return resp.read().decode("utf-8", errors="ignore")
+
+    text = cached_text(cache_key, _fetch, validate=_news_reply_ok)
+    return _parse_news_reply(text).get("data", {})
+
+
+def _parse_news_reply(text: str) -> dict:
     try:
-        obj = json.loads(data.decode("utf-8"))
+        obj = json.loads(text)
     except Exception:
         # Some endpoints may return JSONP; try to strip callback
-        text = data.decode("utf-8", errors="ignore")
         start = text.find("({")
         end = text.rfind("})")
         if start != -1 and end != -1:
@@ -46,7 +61,16 @@ def fetch_page(page_index: int, column: int):
             raise
     if str(obj.get("code")) not in ("1", 1):
         raise RuntimeError(f"API error: {obj.get('message')} ({obj.get('code')})")
-    return obj.get("data", {})
+    return obj
+
+
+def _news_reply_ok(text: str) -> bool:
+    # Only successful replies go into the shared cache
+    try:
+        _parse_news_reply(text)
+        return True
+    except Exception:
+        return False
 
 
 def get_today_news(column: int):
@@ -55,17 +79,20 @@ def get_today_news(column: int):
     return get_news_by_date_range(column, today, today)
 
 
-def get_news_by_date_range(column: int, start_date: str, end_date: str):
+def get_news_by_date_range(column: int, start_date: str, end_date: str, max_pages: int = 100):
     """Fetch news for a column within [start_date, end_date] inclusive (YYYY-MM-DD).
 
     Pagination strategy: keep fetching until we encounter a page where all items
     are strictly below `start_date` (older than the requested window). This avoids
     prematurely stopping on pages that are above the range (e.g., today's items
-    when fetching yesterday).
+    when fetching yesterday). If the walk stops before getting there (`max_pages`
+    or an empty page), a `Partial` is returned whose `covered_from` is the day after
+    the oldest item seen (None when nothing was seen).
     """
     results = []
     page_index = 1
     below_start_pages = 0
+    oldest = None
     while True:
         data = fetch_page(page_index, column)
         items = data.get("list") or []
@@ -76,6 +103,8 @@ def get_news_by_date_range(column: int, start_date: str, end_date: str):
         for it in items:
             show_time_full = it.get("showTime") or ""
             show_date = (show_time_full.split(" ")[0] or "").strip()
+            if show_date and (oldest is None or show_date < oldest):
+                oldest = show_date
             if start_date <= show_date <= end_date:
                 any_in_range = True
                 results.append({
@@ -99,9 +128,12 @@ def get_news_by_date_range(column: int, start_date: str, end_date: str):
             break
 
         page_index += 1
-        if page_index > 100:  # safety cap
+        if page_index > max_pages:  # safety cap
             break
-    return results
+    if oldest is not None and oldest < start_date:
+        return results
+    # Cut off before reaching start_date: the oldest day seen may itself be incomplete
+    return Partial(results, covered_from=next_day(oldest) if oldest else None)
 
 
 def build_html(items):
@@ -157,7 +189,8 @@ def build_html(items):
     return "".join(parts)
 
 
-def build_html_tabs(domestic_items, international_items, industry_reports):
+def build_html_tabs(domestic_items, international_items, industry_reports, assets: dict = None):
+    """Tabbed page (国内/国际/行业研报); `assets` links shared theme CSS/JS instead of inlining."""
     dt = datetime.now().strftime("%Y-%m-%d")
     head = (
         "<!DOCTYPE html>\n"
@@ -166,51 +199,14 @@ def build_html_tabs(domestic_items, international_items, industry_reports):
         "  <meta charset=\"utf-8\" />\n"
         "  <meta name=\"viewport\" content=\"width=device-width, initial-scale=1\" />\n"
         "  <title>今日新闻（" + dt + "）</title>\n"
-        "  <style>\n"
-        "    body { font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, 'Noto Sans', 'PingFang SC', 'Microsoft YaHei', sans-serif; margin: 20px; }\n"
-        "    h1 { font-size: 20px; margin-bottom: 12px; }\n"
-        "    .tabs { margin-bottom: 12px; }\n"
-        "    .tab-btn { display: inline-block; padding: 6px 10px; margin-right: 8px; border: 1px solid #e5e7eb; border-radius: 6px; cursor: pointer; background: #f9fafb; }\n"
-        "    .tab-btn.active { background: #e5e7eb; }\n"
-        "    .item { border: 1px solid #e5e7eb; border-radius: 8px; padding: 12px; margin-bottom: 10px; }\n"
-        "    .title { cursor: pointer; color: #0366d6; font-weight: 600; display: inline-block; }\n"
-        "    .meta { color: #6b7280; font-size: 12px; margin-left: 8px; }\n"
-        "    .summary { display: none; margin-top: 8px; line-height: 1.6; }\n"
-        "    .link { display: block; margin-top: 8px; font-size: 12px; color: #374151; }\n"
-        "  </style>\n"
-        "  <script>\n"
-        "    function toggle(id) {\n"
-        "      var el = document.getElementById(id);\n"
-        "      if (!el) return;\n"
-        "      el.style.display = (el.style.display === 'none' || el.style.display === '') ? 'block' : 'none';\n"
-        "    }\n"
-        "    function switchTab(tab){\n"
-        "      var dom = document.getElementById('domestic');\n"
-        "      var intl = document.getElementById('international');\n"
-        "      var ind = document.getElementById('industry');\n"
-        "      var b1 = document.getElementById('btn-domestic');\n"
-        "      var b2 = document.getElementById('btn-international');\n"
-        "      var b3 = document.getElementById('btn-industry');\n"
-        "      if(tab==='domestic'){\n"
-        "        dom.style.display='block'; intl.style.display='none'; ind.style.display='none';\n"
-        "        b1.classList.add('active'); b2.classList.remove('active'); b3.classList.remove('active');\n"
-        "      } else if(tab==='international'){\n"
-        "        dom.style.display='none'; intl.style.display='block'; ind.style.display='none';\n"
-        "        b1.classList.remove('active'); b2.classList.add('active'); b3.classList.remove('active');\n"
-        "      } else {\n"
-        "        dom.style.display='none'; intl.style.display='none'; ind.style.display='block';\n"
-        "        b1.classList.remove('active'); b2.classList.remove('active'); b3.classList.add('active');\n"
-        "      }\n"
-        "    }\n"
-        "    window.addEventListener('DOMContentLoaded', function(){ switchTab('domestic'); });\n"
-        "  </script>\n"
-        "</head>\n"
+        + theme_assets.head_assets("classic", assets)
+        + "</head>\n"
         "<body>\n"
         "  <h1>东方财富 · 今日新闻（" + dt + "）</h1>\n"
         "  <div class=\"tabs\">\n"
-        "    <button id=\"btn-domestic\" class=\"tab-btn\" onclick=\"switchTab('domestic')\">国内经济</button>\n"
-        "    <button id=\"btn-international\" class=\"tab-btn\" onclick=\"switchTab('international')\">国际经济</button>\n"
-        "    <button id=\"btn-industry\" class=\"tab-btn\" onclick=\"switchTab('industry')\">行业研报</button>\n"
+        "    <button id=\"btn-tab-domestic\" class=\"tab-btn\" onclick=\"switchTab('domestic')\">国内经济</button>\n"
+        "    <button id=\"btn-tab-international\" class=\"tab-btn\" onclick=\"switchTab('international')\">国际经济</button>\n"
+        "    <button id=\"btn-tab-industry\" class=\"tab-btn\" onclick=\"switchTab('industry')\">行业研报</button>\n"
         "  </div>\n"
     )
     parts = [head]
@@ -218,7 +214,7 @@ def build_html_tabs(domestic_items, international_items, industry_reports):
 
     def render_section(items, section_id):
         out = []
-        out.append(f"<div id=\"{section_id}\" style=\"display:none\">\n")
+        out.append(f"<div id=\"tab-{section_id}\" style=\"display:none\">\n")
         if not items:
             out.append("<p>未获取到今日新闻。</p>\n")
         for idx, it in enumerate(items, start=1):
@@ -231,7 +227,7 @@ def build_html_tabs(domestic_items, international_items, industry_reports):
             out.append(
                 f"""
   <div class=\"item\">\n
-    <a class=\"title\" onclick=\"toggle('{sid}')\">{title}</a>
+    <a class=\"title-toggle\" onclick=\"toggle('{sid}')\">{title}</a>
     <span class=\"meta\">{time_str}</span>
     <div id=\"{sid}\" class=\"summary\">{summary}</div>
     <a class=\"link\" href=\"{url}\" target=\"_blank\">原文链接</a>
@@ -244,7 +240,7 @@ def build_html_tabs(domestic_items, international_items, industry_reports):
     parts.append(render_section(domestic_items, "domestic"))
     parts.append(render_section(international_items, "international"))
     # 行业研报：仅显示行业名称和报告标题（报告标题可点击）
-    parts.append("<div id=\"industry\" style=\"display:none\">\n")
+    parts.append("<div id=\"tab-industry\" style=\"display:none\">\n")
     if not industry_reports:
         parts.append("<p>未获取到行业研报。</p>\n")
     else:
@@ -258,7 +254,7 @@ def build_html_tabs(domestic_items, international_items, industry_reports):
                 f"""
   <div class=\"item\">\n
     <div><span class=\"meta\">行业：</span>{ind}</div>
-    <a class=\"title\" href=\"{url}\" target=\"_blank\">{title}</a>
+    <a class=\"title-link\" href=\"{url}\" target=\"_blank\">{title}</a>
     <span class=\"meta\">{time_str}</span>
   </div>
 """
@@ -315,58 +311,68 @@ def filter_items(items, cfg):
     # Filtering removed per user request
     return items
 
-def fetch_industry_reports(limit: int = 50, begin: str = None, end: str = None):
-    import json as _json
-    from urllib.parse import urlencode as _urlencode
-    from datetime import datetime as _dt
-
+def _fetch_industry_page(begin: str, end: str, page_no: int = 1, page_size: int = 50):
+    """Fetch one raw page of the industry report list; returns (rows, total_pages)."""
     base = "https://reportapi.eastmoney.com/report/list"
-    today = _dt.now().strftime("%Y-%m-%d")
-    if not begin and not end:
-        begin = end = today
-    elif begin and not end:
-        end = begin
     params = {
         "cb": "cb",
         "industryCode": "*",
-        "pageSize": max(limit, 50),
+        "pageSize": page_size,
         "industry": "*",
         "rating": "*",
         "ratingChange": "*",
         # 指定时间范围（默认今天）
         "beginTime": begin,
         "endTime": end,
-        "pageNo": 1,
+        "pageNo": page_no,
         "fields": "",
         "qType": 1,  # 行业研报
     }
-    url = base + "?" + _urlencode(params)
-    req = Request(url, headers={
-        "User-Agent": "Mozilla/5.0",
-        "Referer": "https://data.eastmoney.com/report/industry.jshtml",
-    })
-    with urlopen(req, timeout=20) as resp:
-        txt = resp.read().decode("utf-8", errors="ignore")
-    # JSONP: cb({...})
+    url = base + "?" + urlencode(params)
+
+    def _fetch():
+        req = Request(url, headers={
+            "User-Agent": "Mozilla/5.0",
+            "Referer": "https://data.eastmoney.com/report/industry.jshtml",
+        })
+        with urlopen(req, timeout=20) as resp:
+            return resp.read().decode("utf-8", errors="ignore")
+
+    txt = cached_text(url, _fetch, validate=lambda t: _parse_industry_reply(t) is not None)
+    obj = _parse_industry_reply(txt)
+    if obj is None:
+        raise RuntimeError("malformed industry report reply")
+    try:
+        total_pages = int(obj.get("TotalPage") or 1)
+    except (TypeError, ValueError):
+        total_pages = 1
+    return obj.get("data") or [], total_pages
+
+
+def _parse_industry_reply(txt: str):
+    """JSONP `cb({...})` -> dict, or None when the reply is malformed."""
     start_idx = txt.find("(")
     end_idx = txt.rfind(")")
     if start_idx == -1 or end_idx == -1:
-        return []
-    obj = _json.loads(txt[start_idx + 1:end_idx])
-    data = obj.get("data") or []
+        return None
+    try:
+        obj = json.loads(txt[start_idx + 1:end_idx])
+    except ValueError:
+        return None
+    return obj if isinstance(obj, dict) else None
+
+
+def _normalize_industry_reports(data, begin: str, end: str):
     # 按日期严格过滤（防止接口边界差异）
-    b, e = begin, end
     def _date10(v):
         try:
             return str(v)[:10]
         except Exception:
             return ""
-    today_list = [
-        it for it in data
-        if b <= _date10(it.get("publishDate")) <= e
-    ]
     out = []
-    for it in today_list[:limit]:
+    for it in data:
+        if not (begin <= _date10(it.get("publishDate")) <= end):
+            continue
         title = it.get("title") or ""
         industry_name = it.get("industryName") or it.get("indvInduName") or ""
         info_code = it.get("infoCode") or ""
@@ -380,7 +386,52 @@ def fetch_industry_reports(limit: int = 50, begin: str = None, end: str = None):
         })
     return out
 
-def main(out_path: str, config_path=None, start_date: str = None, end_date: str = None):
+
+def fetch_industry_reports(limit: int = 50, begin: str = None, end: str = None):
+    today = datetime.now().strftime("%Y-%m-%d")
+    if not begin and not end:
+        begin = end = today
+    elif begin and not end:
+        end = begin
+    try:
+        data, _ = _fetch_industry_page(begin, end, page_no=1, page_size=max(limit, 50))
+    except RuntimeError:
+        return []
+    return _normalize_industry_reports(data, begin, end)[:limit]
+
+
+def fetch_industry_reports_range(begin: str, end: str, page_size: int = 100, max_pages: int = 50):
+    """Fetch every industry report in [begin, end], following pagination (no `limit` cut).
+
+    Reports come newest first; if pages remain after `max_pages` (or a page comes
+    back empty early), a `Partial` is returned whose `covered_from` is the day after
+    the oldest report seen.
+    """
+    out = []
+    oldest = None
+    page_no = 1
+    while True:
+        data, total_pages = _fetch_industry_page(begin, end, page_no=page_no, page_size=page_size)
+        if not data:
+            complete = page_no == 1  # a well-formed empty first page: no reports in range
+            break
+        for it in data:
+            d = str(it.get("publishDate") or "")[:10]
+            if d and (oldest is None or d < oldest):
+                oldest = d
+        out.extend(_normalize_industry_reports(data, begin, end))
+        if page_no >= total_pages:
+            complete = True
+            break
+        if page_no >= max_pages:
+            complete = False
+            break
+        page_no += 1
+    if complete or (oldest is not None and oldest < begin):
+        return out
+    return Partial(out, covered_from=next_day(oldest) if oldest else None)
+
+def main(out_path: str, config_path=None, start_date: str = None, end_date: str = None, standalone: bool = False):
     # 国内经济 column 350, 国际经济 column 351
     if start_date and end_date:
         domestic = filter_items(get_news_by_date_range(350, start_date, end_date), None)
@@ -390,17 +441,21 @@ def main(out_path: str, config_path=None, start_date: str = None, end_date: str
         domestic = filter_items(get_today_news(350), None)
         international = filter_items(get_today_news(351), None)
         industry_reports = fetch_industry_reports()
-    html = build_html_tabs(domestic, international, industry_reports)
+    assets = None if standalone else theme_assets.write_assets(os.path.dirname(out_path) or ".", "classic")
+    html = build_html_tabs(domestic, international, industry_reports, assets=assets)
     with open(out_path, "w", encoding="utf-8") as f:
         f.write(html)
     print(f"Wrote {len(domestic)} domestic + {len(international)} international + {len(industry_reports)} industry reports to {out_path}")
 
 
 if __name__ == "__main__":
-    out = sys.argv[1] if len(sys.argv) > 1 else "eastmoney_gn_gj_today.html"
+    # --standalone 内联样式与脚本（默认引用 assets/ 下的共享文件）
+    standalone = "--standalone" in sys.argv
+    argv = [a for a in sys.argv if a != "--standalone"]
+    out = argv[1] if len(argv) > 1 else "eastmoney_gn_gj_today.html"
     # 可选日期范围参数：YYYY-MM-DD YYYY-MM-DD
-    if len(sys.argv) >= 4:
-        s, e = sys.argv[2], sys.argv[3]
-        main(out, start_date=s, end_date=e)
+    if len(argv) >= 4:
+        s, e = argv[2], argv[3]
+        main(out, start_date=s, end_date=e, standalone=standalone)
     else:
-        main(out)
+        main(out, standalone=standalone)
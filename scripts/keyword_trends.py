@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""Daily keyword rollups per source, kept as day x keyword count matrices.
+
+For every source (`news-350`, `news-351`, `industry`) one `.npz` under
+`<store>/_trends/` holds an int32 matrix `counts[day, keyword]` (items whose title
+or summary mentions the keyword), `totals[day]` (items that day) and a `filled`
+mask, indexed by day offset from `origin`. The matrices are updated whenever the
+range planner fetches days, so a trend over any span is an array slice rather
+than a rescan of stored items. Without numpy the rollups are skipped.
+
+Usage:
+  python3 scripts/keyword_trends.py rebuild [--source news-350,news-351,industry] [--keywords 半导体,新能源,利率]
+  python3 scripts/keyword_trends.py show --start YYYY-MM-DD --end YYYY-MM-DD [--source news-350] [--keywords ...]
+"""
+import argparse
+import os
+import sys
+from datetime import date, datetime
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import range_planner
+from fetch_cache import FileLock
+
+
+DEFAULT_KEYWORDS = ("半导体", "新能源", "利率", "人工智能", "房地产", "消费", "出口", "医药")
+TREND_SOURCES = ("news-350", "news-351", "industry")
+SOURCE_LABELS = {"news-350": "国内经济", "news-351": "国际经济", "industry": "行业研报"}
+
+
+def _ordinal(day: str) -> int:
+    return datetime.strptime(day[:10], "%Y-%m-%d").date().toordinal()
+
+
+def _trend_path(source: str, root: str = None) -> str:
+    return os.path.join(range_planner.store_dir(root), "_trends", f"{source}.npz")
+
+
+def item_text(it) -> str:
+    return " ".join(str(it.get(k) or "") for k in ("title", "summary", "industryName"))
+
+
+def count_day(items, keywords):
+    """Per-keyword count of items mentioning it (each item counts once per keyword)."""
+    texts = [item_text(it) for it in items]
+    return np.array([sum(1 for t in texts if kw in t) for kw in keywords], dtype=np.int32)
+
+
+def load(source: str, root: str = None):
+    """Return the stored rollup as a dict of arrays, or None."""
+    try:
+        with np.load(_trend_path(source, root)) as z:
+            return {
+                "origin": int(z["origin"]),
+                "keywords": [str(k) for k in z["keywords"]],
+                "counts": z["counts"],
+                "totals": z["totals"],
+                "filled": z["filled"],
+            }
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _save(source: str, r, root: str = None):
+    path = _trend_path(source, root)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez(tmp, origin=np.int64(r["origin"]), keywords=np.array(r["keywords"]),
+             counts=r["counts"], totals=r["totals"], filled=r["filled"])
+    os.replace(tmp, path)
+
+
+def _cover(r, lo: int, hi: int, keywords):
+    """Grow `r` (or create it) so ordinals [lo, hi] and every keyword have a slot."""
+    if r is None:
+        n = hi - lo + 1
+        return {"origin": lo, "keywords": list(keywords), "counts": np.zeros((n, len(keywords)), np.int32),
+                "totals": np.zeros(n, np.int32), "filled": np.zeros(n, bool)}
+    origin = min(r["origin"], lo)
+    end = max(r["origin"] + len(r["totals"]) - 1, hi)
+    kws = r["keywords"] + [k for k in keywords if k not in r["keywords"]]
+    if origin == r["origin"] and end == r["origin"] + len(r["totals"]) - 1 and len(kws) == len(r["keywords"]):
+        return r
+    n = end - origin + 1
+    off = r["origin"] - origin
+    m = len(r["totals"])
+    counts = np.zeros((n, len(kws)), np.int32)
+    counts[off:off + m, :len(r["keywords"])] = r["counts"]
+    totals = np.zeros(n, np.int32)
+    totals[off:off + m] = r["totals"]
+    filled = np.zeros(n, bool)
+    filled[off:off + m] = r["filled"]
+    return {"origin": origin, "keywords": kws, "counts": counts, "totals": totals, "filled": filled}
+
+
+def ingest(source: str, day_items: dict, keywords=DEFAULT_KEYWORDS, root: str = None):
+    """Replace the rows of the given days with counts from `day_items` ({YYYY-MM-DD: items}).
+
+    Keywords new to the stored matrix are backfilled from the day partitions.
+    """
+    if np is None or not day_items:
+        return
+    path = _trend_path(source, root)
+    ords = {d: _ordinal(d) for d in day_items}
+    with FileLock(path + ".lock"):
+        r = load(source, root)
+        new_kws = [k for k in keywords if r is None or k not in r["keywords"]]
+        r = _cover(r, min(ords.values()), max(ords.values()), keywords)
+        if new_kws and r["filled"].any():
+            _backfill_columns(source, r, new_kws, root)
+        for d, items in day_items.items():
+            i = ords[d] - r["origin"]
+            r["counts"][i] = count_day(items, r["keywords"])
+            r["totals"][i] = len(items)
+            r["filled"][i] = True
+        _save(source, r, root)
+
+
+def _backfill_columns(source: str, r, new_kws, root: str = None):
+    cols = [r["keywords"].index(k) for k in new_kws]
+    for i in np.flatnonzero(r["filled"]):
+        day = date.fromordinal(int(r["origin"] + i)).isoformat()
+        items = range_planner.load_partition(source, day, root)
+        if items is not None:
+            r["counts"][i, cols] = count_day(items, new_kws)
+
+
+def ensure_keywords(source: str, keywords, root: str = None):
+    """Add columns for keywords the stored rollup lacks, counted from the day partitions."""
+    if np is None:
+        return
+    path = _trend_path(source, root)
+    with FileLock(path + ".lock"):
+        r = load(source, root)
+        if r is None:
+            return
+        new_kws = [k for k in keywords if k not in r["keywords"]]
+        if not new_kws:
+            return
+        r = _cover(r, r["origin"], r["origin"] + len(r["totals"]) - 1, keywords)
+        _backfill_columns(source, r, new_kws, root)
+        _save(source, r, root)
+
+
+def rebuild(source: str, keywords=DEFAULT_KEYWORDS, root: str = None) -> int:
+    """Recompute a source's rollup from all stored day partitions; returns the number of days."""
+    sdir = os.path.join(range_planner.store_dir(root), source)
+    day_items = {}
+    if os.path.isdir(sdir):
+        for name in sorted(os.listdir(sdir)):
+            if name.endswith(".json"):
+                items = range_planner.load_partition(source, name[:-5], root)
+                if items is not None:
+                    day_items[name[:-5]] = items
+    path = _trend_path(source, root)
+    with FileLock(path + ".lock"):
+        if os.path.exists(path):
+            os.remove(path)
+    ingest(source, day_items, keywords, root)
+    return len(day_items)
+
+
+def series(source: str, start: str, end: str, keywords=DEFAULT_KEYWORDS, root: str = None):
+    """Counts for `[start, end]` as (counts[n_days, n_keywords], totals[n_days], filled[n_days]).
+
+    Days or keywords outside the stored matrix come back as zeros / unfilled.
+    """
+    lo, hi = _ordinal(start), _ordinal(end)
+    n = hi - lo + 1
+    counts = np.zeros((n, len(keywords)), np.int32)
+    totals = np.zeros(n, np.int32)
+    filled = np.zeros(n, bool)
+    r = load(source, root)
+    if r is None:
+        return counts, totals, filled
+    a = max(lo, r["origin"])
+    b = min(hi, r["origin"] + len(r["totals"]) - 1)
+    if a <= b:
+        src = slice(a - r["origin"], b - r["origin"] + 1)
+        dst = slice(a - lo, b - lo + 1)
+        for j, kw in enumerate(keywords):
+            if kw in r["keywords"]:
+                counts[dst, j] = r["counts"][src, r["keywords"].index(kw)]
+        totals[dst] = r["totals"][src]
+        filled[dst] = r["filled"][src]
+    return counts, totals, filled
+
+
+def trend_data(start: str, end: str, keywords=DEFAULT_KEYWORDS, sources=TREND_SOURCES, root: str = None):
+    """Everything the trend tab renders: {start, end, keywords, sources: {source: (counts, totals, filled)}}.
+
+    Keywords not yet in a stored rollup are backfilled first, so ad-hoc keywords are not all zeros.
+    """
+    if np is None:
+        return None
+    for s in sources:
+        ensure_keywords(s, keywords, root)
+    return {
+        "start": start,
+        "end": end,
+        "keywords": list(keywords),
+        "sources": {s: series(s, start, end, keywords, root) for s in sources},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain and query the daily keyword rollups")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    rb = sub.add_parser("rebuild", help="Recompute rollups from the stored day partitions")
+    rb.add_argument("--source", default=",".join(TREND_SOURCES))
+    rb.add_argument("--keywords", default=",".join(DEFAULT_KEYWORDS))
+    sh = sub.add_parser("show", help="Print daily counts for a span")
+    sh.add_argument("--start", required=True)
+    sh.add_argument("--end", required=True)
+    sh.add_argument("--source", default=",".join(TREND_SOURCES))
+    sh.add_argument("--keywords", default=",".join(DEFAULT_KEYWORDS))
+    args = parser.parse_args()
+
+    if np is None:
+        print("[error] numpy is not installed", file=sys.stderr)
+        sys.exit(1)
+    sources = [s.strip() for s in args.source.split(",") if s.strip()]
+    keywords = [k.strip() for k in args.keywords.split(",") if k.strip()]
+    if args.cmd == "rebuild":
+        for s in sources:
+            print(f"{s}: {rebuild(s, keywords)} days")
+        return
+    days = range_planner.day_range(args.start, args.end)
+    for s in sources:
+        ensure_keywords(s, keywords)
+        counts, totals, filled = series(s, args.start, args.end, keywords)
+        print(f"[{s}] {int(filled.sum())}/{len(days)} days covered")
+        print("date\ttotal\t" + "\t".join(keywords))
+        for d, c, t, f in zip(days, counts, totals, filled):
+            if f:
+                print(f"{d}\t{t}\t" + "\t".join(str(int(x)) for x in c))
+
+
+if __name__ == "__main__":
+    main()
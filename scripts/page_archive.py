@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""Manifest-indexed archive of generated pages in `Data/`.
+
+Every build appends one JSON line to `Data/manifest.jsonl` (output path, range,
+codes, item counts, content hash) and writes the entry to two small files under
+`Data/.manifest_latest/`, one keyed by query and one by page name, so "latest page
+for this query" is a single file read and recording a page costs the same however
+long the history is. `Data/index.html` is a browsable history (oldest first) that
+each build extends by one appended row; `index` and `compact` rewrite it in full.
+
+Usage:
+  python3 scripts/page_archive.py latest [--dir Data] [--name combined_today] [--start YYYY-MM-DD --end YYYY-MM-DD] [--codes 688111,HK2097]
+  python3 scripts/page_archive.py index [--dir Data]
+  python3 scripts/page_archive.py compact [--dir Data] [--keep 3] [--dry-run]
+"""
+import argparse
+import hashlib
+import html as _html
+import json
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fetch_cache import FileLock
+
+
+MANIFEST = "manifest.jsonl"
+LATEST_DIR = ".manifest_latest"
+INDEX_PAGE = "index.html"
+
+
+def query_key(name: str, start: str, end: str, codes) -> str:
+    return f"{name}|{start}|{end}|{','.join(sorted(codes or []))}"
+
+
+def content_hash(html: str) -> str:
+    return hashlib.sha256(html.encode("utf-8")).hexdigest()
+
+
+def _manifest_lock(out_dir: str):
+    """Exclusive lock on `<dir>/.manifest.lock` while the manifest/index are updated."""
+    return FileLock(os.path.join(out_dir, ".manifest.lock"))
+
+
+def _write_json(path: str, obj):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+
+def _latest_path(out_dir: str, kind: str, key: str) -> str:
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:20]
+    return os.path.join(out_dir, LATEST_DIR, f"{kind}-{digest}.json")
+
+
+def _write_latest(out_dir: str, entry):
+    os.makedirs(os.path.join(out_dir, LATEST_DIR), exist_ok=True)
+    _write_json(_latest_path(out_dir, "query", entry["query"]), entry)
+    _write_json(_latest_path(out_dir, "name", entry["name"]), entry)
+
+
+def _read_json(path: str):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def read_manifest(out_dir: str):
+    entries = []
+    try:
+        with open(os.path.join(out_dir, MANIFEST), "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        continue
+    except OSError:
+        pass
+    return entries
+
+
+def record_page(out_dir: str, path: str, html: str, name: str, start: str, end: str, codes, counts: dict, theme: str = "classic"):
+    """Append a manifest entry for a freshly written page and update the latest-page index."""
+    entry = {
+        "path": os.path.relpath(path, out_dir),
+        "name": name,
+        "start": start,
+        "end": end,
+        "codes": sorted(codes or []),
+        "theme": theme,
+        "counts": counts,
+        "sha256": content_hash(html),
+        "bytes": len(html.encode("utf-8")),
+        "created": datetime.now().isoformat(timespec="seconds"),
+    }
+    entry["query"] = query_key(name, start, end, codes)
+    os.makedirs(out_dir, exist_ok=True)
+    with _manifest_lock(out_dir):
+        with open(os.path.join(out_dir, MANIFEST), "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        _write_latest(out_dir, entry)
+        index_path = os.path.join(out_dir, INDEX_PAGE)
+        if os.path.exists(index_path):
+            with open(index_path, "a", encoding="utf-8") as f:
+                f.write(_index_row(entry))
+        else:
+            write_index_page(out_dir)
+    return entry
+
+
+def latest(out_dir: str, name: str = None, start: str = None, end: str = None, codes=None):
+    """Newest entry for an exact query (name+range+codes), or for a page name alone."""
+    if start and end:
+        return _read_json(_latest_path(out_dir, "query", query_key(name, start, end, codes)))
+    return _read_json(_latest_path(out_dir, "name", name))
+
+
+def _esc(v) -> str:
+    return _html.escape(str(v or ""), quote=True)
+
+
+def _index_row(e) -> str:
+    rng = e.get("start") if e.get("start") == e.get("end") else f"{e.get('start')} 至 {e.get('end')}"
+    counts = " · ".join(f"{k} {v}" for k, v in (e.get("counts") or {}).items())
+    codes = ",".join(e.get("codes") or []) or "—"
+    return (
+        f"<tr><td>{_esc(e.get('created'))}</td><td><a href=\"{_esc(e.get('path'))}\">{_esc(e.get('name'))}</a></td>"
+        f"<td>{_esc(rng)}</td><td>{_esc(codes)}</td><td>{_esc(counts)}</td><td><code>{_esc((e.get('sha256') or '')[:10])}</code></td></tr>\n"
+    )
+
+
+def write_index_page(out_dir: str, entries=None) -> str:
+    """Rewrite `index.html` from the manifest.
+
+    The table is left open (no closing tags, which browsers supply) so that
+    `record_page` can append one row per build without rereading anything.
+    """
+    entries = read_manifest(out_dir) if entries is None else entries
+    rows = [_index_row(e) for e in sorted(entries, key=lambda x: x.get("created", ""))]
+    html = (
+        "<!DOCTYPE html>\n<html lang=\"zh-CN\">\n<head>\n<meta charset=\"utf-8\" />\n"
+        "<title>历史页面索引</title>\n<style>\n"
+        "body { font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'PingFang SC', 'Microsoft YaHei', sans-serif; margin: 20px; }\n"
+        "table { border-collapse: collapse; width: 100%; font-size: 13px; }\n"
+        "th, td { border-bottom: 1px solid #e5e7eb; padding: 6px 8px; text-align: left; }\n"
+        "</style>\n</head>\n<body>\n"
+        "<h1>历史页面索引（按生成时间，最新在底部）</h1>\n"
+        "<table>\n<tr><th>生成时间</th><th>页面</th><th>范围</th><th>个股</th><th>条目数</th><th>哈希</th></tr>\n"
+        + "".join(rows)
+    )
+    path = os.path.join(out_dir, INDEX_PAGE)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(html)
+    os.replace(tmp, path)
+    return path
+
+
+def compact(out_dir: str, keep: int = 3, dry_run: bool = False):
+    """Drop identical and superseded pages.
+
+    Per query key, pages whose content hash matches a newer page are dropped, and
+    of the remaining ones only the newest `keep` are retained. Files still referenced
+    by a kept entry are never deleted. Rewrites the manifest; returns removed entries.
+    """
+    with _manifest_lock(out_dir):
+        entries = read_manifest(out_dir)
+        groups = {}
+        for e in entries:
+            groups.setdefault(e.get("query"), []).append(e)
+        kept, removed = [], []
+        for group in groups.values():
+            group.sort(key=lambda x: x.get("created", ""), reverse=True)
+            seen_hashes = set()
+            retained = 0
+            for e in group:
+                if e.get("sha256") in seen_hashes or retained >= keep:
+                    removed.append(e)
+                    continue
+                seen_hashes.add(e.get("sha256"))
+                retained += 1
+                kept.append(e)
+        if dry_run:
+            return removed
+        kept.sort(key=lambda x: x.get("created", ""))
+        kept_paths = {e["path"] for e in kept}
+        for e in removed:
+            if e["path"] not in kept_paths:
+                try:
+                    os.remove(os.path.join(out_dir, e["path"]))
+                except OSError:
+                    pass
+        tmp = os.path.join(out_dir, f"{MANIFEST}.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for e in kept:
+                f.write(json.dumps(e, ensure_ascii=False) + "\n")
+        os.replace(tmp, os.path.join(out_dir, MANIFEST))
+        latest_dir = os.path.join(out_dir, LATEST_DIR)
+        if os.path.isdir(latest_dir):
+            for name in os.listdir(latest_dir):
+                os.remove(os.path.join(latest_dir, name))
+        for e in kept:  # oldest first, so the newest entry per key wins
+            _write_latest(out_dir, e)
+        write_index_page(out_dir, kept)
+    return removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query and maintain the generated page archive")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--dir", default="Data", help="Archive directory (default Data)")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    lt = sub.add_parser("latest", parents=[common], help="Print the newest page path for a name or exact query")
+    lt.add_argument("--name", default="combined")
+    lt.add_argument("--start", default=None)
+    lt.add_argument("--end", default=None)
+    lt.add_argument("--codes", default="")
+    sub.add_parser("index", parents=[common], help="Rewrite Data/index.html from the manifest")
+    cp = sub.add_parser("compact", parents=[common], help="Drop identical/superseded pages")
+    cp.add_argument("--keep", type=int, default=3, help="Pages kept per query (default 3)")
+    cp.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    if args.cmd == "latest":
+        codes = [c.strip() for c in args.codes.split(",") if c.strip()]
+        entry = latest(args.dir, args.name, args.start, args.end or args.start, codes)
+        if not entry:
+            print("[error] No page recorded for this query.", file=sys.stderr)
+            sys.exit(1)
+        print(os.path.join(args.dir, entry["path"]))
+    elif args.cmd == "index":
+        print(write_index_page(args.dir))
+    else:
+        removed = compact(args.dir, keep=args.keep, dry_run=args.dry_run)
+        verb = "Would remove" if args.dry_run else "Removed"
+        print(f"{verb} {len(removed)} pages")
+        for e in removed:
+            print(f"  {e['path']}")
+
+
+if __name__ == "__main__":
+    main()
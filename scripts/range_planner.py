@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""Day-partitioned range planner for the news sources.
+
+A request for `[start, end]` is split into one partition per day. Closed days
+(before today) are immutable once fetched, so they are materialized as
+`<store>/<source>/<YYYY-MM-DD>.json`; today is always refetched. Only the runs of
+missing days are fetched, and the result is assembled from stored and fresh
+partitions in date order.
+
+Environment:
+  NEWS_STORE_DIR  partition directory (default `Data/.store`)
+"""
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+
+
+DEFAULT_STORE_DIR = "Data/.store"
+
+
+class Partial(list):
+    """Items that do not fully cover the range they were fetched for.
+
+    A fetcher returns one with `covered_from`, the oldest day it fully reached
+    (None when no day can be trusted, e.g. an empty or malformed reply); older days
+    are never materialized. `fetch_range` returns one with `uncovered`, the sorted
+    days whose items may be incomplete.
+    """
+
+    def __init__(self, items=(), covered_from: str = None, uncovered=()):
+        super().__init__(items)
+        self.covered_from = covered_from
+        self.uncovered = list(uncovered)
+
+
+def next_day(day: str) -> str:
+    return (datetime.strptime(day[:10], "%Y-%m-%d").date() + timedelta(days=1)).isoformat()
+
+
+def store_dir(path: str = None) -> str:
+    return path or os.environ.get("NEWS_STORE_DIR") or DEFAULT_STORE_DIR
+
+
+def day_range(start: str, end: str):
+    s = datetime.strptime(start, "%Y-%m-%d").date()
+    e = datetime.strptime(end, "%Y-%m-%d").date()
+    out = []
+    while s <= e:
+        out.append(s.isoformat())
+        s += timedelta(days=1)
+    return out
+
+
+def contiguous_runs(days):
+    """Group sorted YYYY-MM-DD strings into inclusive (start, end) runs of consecutive days."""
+    runs = []
+    for d in days:
+        if runs:
+            prev = datetime.strptime(runs[-1][1], "%Y-%m-%d").date()
+            if datetime.strptime(d, "%Y-%m-%d").date() == prev + timedelta(days=1):
+                runs[-1][1] = d
+                continue
+        runs.append([d, d])
+    return [(s, e) for s, e in runs]
+
+
+def is_closed(day: str) -> bool:
+    return day < datetime.now().strftime("%Y-%m-%d")
+
+
+def partition_path(source: str, day: str, root: str = None) -> str:
+    return os.path.join(store_dir(root), source, f"{day}.json")
+
+
+def load_partition(source: str, day: str, root: str = None):
+    """Return the stored items for a closed day, or None when it is not materialized."""
+    if not is_closed(day):
+        return None
+    try:
+        with open(partition_path(source, day, root), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_partition(source: str, day: str, items, root: str = None):
+    path = partition_path(source, day, root)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(items, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def missing_days(source: str, start: str, end: str, root: str = None):
+    return [d for d in day_range(start, end) if load_partition(source, d, root) is None]
+
+
+def fetch_range(source: str, start: str, end: str, fetch_fn, date_of, root: str = None,
+                refresh: bool = False, truncated: bool = False, on_fetched=None):
+    """Return items for `[start, end]`, fetching only days that are not materialized.
+
+    `fetch_fn(run_start, run_end)` fetches one run of consecutive missing days and
+    `date_of(item)` gives an item's `YYYY-MM-DD`. A fetcher that was cut off (page
+    cap, malformed reply) returns a `Partial` with `covered_from`; days before it are
+    neither materialized nor passed on, and the result is a `Partial` listing them in
+    `uncovered`. Set `truncated` for sources that only return the latest N items
+    regardless of range (10jqka stock pages): closed days up to and including the
+    oldest returned day are then left unmaterialized, since the feed may have been
+    cut off inside that day. `on_fetched({day: items})` is called once per fetched
+    run with the fully covered days of that run (used for rollups).
+    """
+    days = day_range(start, end)
+    by_day = {}
+    if not refresh:
+        for d in days:
+            stored = load_partition(source, d, root)
+            if stored is not None:
+                by_day[d] = stored
+    missing = [d for d in days if d not in by_day]
+    uncovered = []
+    for rs, re in contiguous_runs(missing):
+        fetched = fetch_fn(rs, re)
+        covered_from = fetched.covered_from if isinstance(fetched, Partial) else rs
+        if covered_from is None:
+            covered_from = next_day(re)
+        buckets = {}
+        seen_days = []
+        for it in fetched:
+            d = (date_of(it) or "")[:10]
+            if d:
+                seen_days.append(d)
+            if rs <= d <= re:
+                buckets.setdefault(d, []).append(it)
+        floor = min(seen_days) if truncated and seen_days else None
+        covered = {}
+        for d in day_range(rs, re):
+            items = buckets.get(d, [])
+            by_day[d] = items
+            if d < covered_from:
+                uncovered.append(d)
+                continue
+            covered[d] = items
+            if not is_closed(d):
+                continue
+            if truncated and (floor is None or d <= floor):
+                continue
+            write_partition(source, d, items, root)
+        if on_fetched is not None and covered:
+            on_fetched(covered)
+    out = []
+    for d in sorted(days, reverse=True):
+        out.extend(by_day.get(d, []))
+    if uncovered:
+        return Partial(out, uncovered=sorted(uncovered))
+    return out
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""Serve the combined news page locally, fetching each stock tab on first open.
+
+The base sections (国内/国际/行业研报) are rendered immediately; stock tabs are
+placeholders that call `/stock/<code>?start=..&end=..` when opened. Both the base
+sections and per-stock results go through one in-memory LRU cache with a TTL, so
+upstream traffic follows what is actually viewed.
+
+Point `THS_STOCKPAGE_BASE` / `THS_BASIC_BASE` at a local stand-in to run it
+without hitting 10jqka.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+import build_combined_news as builder
+from fetch_cache import LRUCache
+
+
+CODE_RE = re.compile(r"^(HK)?\d{1,6}$", re.IGNORECASE)
+DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+class NewsServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, addr, codes, start, end, theme="classic", deadline=None,
+                 cache_size=256, cache_ttl=300):
+        super().__init__(addr, NewsHandler)
+        self.codes = codes
+        self.start = start
+        self.end = end
+        self.theme = theme
+        self.deadline = deadline
+        self.cache = LRUCache(max_entries=cache_size, ttl=cache_ttl)
+        self.east = builder._load_module(os.path.join(HERE, "fetch_eastmoney_cgnjj.py"))
+        self.ths = builder._load_module(os.path.join(HERE, "fetch_10jqka_stock_news.py"))
+
+    def base_sections(self, start, end):
+        def _fetch():
+            tasks = {
+                "domestic": lambda: builder.fetch_column(self.east, 350, start, end),
+                "international": lambda: builder.fetch_column(self.east, 351, start, end),
+                "industry": lambda: builder.fetch_industry(self.east, start, end),
+            }
+            return builder.run_with_deadline(tasks, self.deadline)
+
+        results, status = self.cache.get_or_compute(("base", start, end), _fetch)
+        if status:
+            # Do not keep incomplete base sections around for the full TTL
+            self.cache.put(("base", start, end), None)
+        return results, status
+
+    def render_index(self, start, end, codes):
+        results, status = self.base_sections(start, end)
+        status = builder.add_coverage_status(dict(status), results, start, end)
+        stock_sections = {c: {"range_start": start, "range_end": end} for c in codes}
+        return builder.build_html_combined(
+            results.get("domestic") or [],
+            results.get("international") or [],
+            results.get("industry") or [],
+            stock_sections,
+            theme=self.theme,
+            page_title=builder.page_title_for(start, end),
+            section_status=status,
+            lazy_stock_url="/stock/",
+        )
+
+    def render_stock(self, code, start, end):
+        sec = self.cache.get_or_compute(
+            ("stock", code, start, end),
+            lambda: builder.fetch_stock(self.ths, code, start, end),
+        )
+        return {
+            "code": code,
+            "hot": builder.render_stock_items(sec["hot_news"], "暂无热点新闻。"),
+            "report": builder.render_stock_items(sec["related_reports"], "暂无相关研报。"),
+        }
+
+
+class NewsHandler(BaseHTTPRequestHandler):
+    def _send(self, status: int, content_type: str, body: str):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_json(self, status: int, obj):
+        self._send(status, "application/json; charset=utf-8", json.dumps(obj, ensure_ascii=False))
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        qs = parse_qs(parsed.query)
+        start = (qs.get("start") or [self.server.start])[0]
+        end = (qs.get("end") or [self.server.end])[0]
+        if not (DATE_RE.match(start) and DATE_RE.match(end)):
+            self._send_json(400, {"error": "start/end must be YYYY-MM-DD"})
+            return
+        if parsed.path in ("/", "/index.html"):
+            codes = self.server.codes
+            if qs.get("codes"):
+                codes = [c.strip() for c in qs["codes"][0].split(",") if c.strip()]
+            codes = [c for c in codes if CODE_RE.match(c)]
+            self._send(200, "text/html; charset=utf-8", self.server.render_index(start, end, codes))
+            return
+        if parsed.path.startswith("/stock/"):
+            code = unquote(parsed.path[len("/stock/"):]).strip()
+            if not CODE_RE.match(code):
+                self._send_json(400, {"error": f"invalid code: {code}"})
+                return
+            try:
+                self._send_json(200, self.server.render_stock(code, start, end))
+            except Exception as e:
+                self._send_json(502, {"error": f"{type(e).__name__}: {e}"})
+            return
+        self._send_json(404, {"error": "not found"})
+
+    def log_message(self, fmt, *args):
+        sys.stderr.write(f"[serve] {self.address_string()} {fmt % args}\n")
+
+
+def main():
+    today = datetime.now().strftime("%Y-%m-%d")
+    parser = argparse.ArgumentParser(description="Serve the combined news page with lazily fetched stock tabs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--codes", default="", help="Comma-separated stock codes, e.g. 688111,HK2097")
+    parser.add_argument("--start", default=today, help="YYYY-MM-DD (default today)")
+    parser.add_argument("--end", default=None, help="YYYY-MM-DD (default --start)")
+    parser.add_argument("--theme", default="classic", help="classic|neon|glass|terminal")
+    parser.add_argument("--deadline", type=float, default=None, help="Time budget (seconds) for the base sections")
+    parser.add_argument("--cache-size", type=int, default=256, help="Max cached sections")
+    parser.add_argument("--cache-ttl", type=float, default=300, help="Seconds a cached section stays fresh")
+    args = parser.parse_args()
+
+    codes = [c.strip() for c in args.codes.split(",") if c.strip()]
+    server = NewsServer(
+        (args.host, args.port), codes, args.start, args.end or args.start,
+        theme=args.theme, deadline=args.deadline, cache_size=args.cache_size, cache_ttl=args.cache_ttl,
+    )
+    print(f"Serving combined news on http://{args.host}:{server.server_address[1]}/ ({len(codes)} lazy stock tabs)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""Theme CSS and page scripts shared by the generated news pages.
+
+Pages either inline these (`--standalone`, served mode) or reference minified,
+content-hashed copies written once per theme under `<out_dir>/assets/`, so an
+archive of pages shares one cached stylesheet/script per theme.
+"""
+import hashlib
+import os
+import re
+
+
+THEMES = ("classic", "neon", "glass", "terminal")
+ASSETS_DIR = "assets"
+
+
+def theme_css(theme: str) -> str:
+    t = (theme or "classic").lower()
+    if t == "neon":
+        return (
+            "body{background:#0b0f19;color:#d1d5db;font-family:Inter,Roboto,system-ui,-apple-system,BlinkMacSystemFont,'Segoe UI','Helvetica Neue',Arial,'Noto Sans','PingFang SC','Microsoft YaHei',sans-serif;margin:0;}\n"
+            ".container{max-width:1080px;margin:24px auto;padding:24px;}\n"
+            ".title{font-size:22px;margin:0 0 16px;background:linear-gradient(90deg,#00e5ff,#a855f7);-webkit-background-clip:text;background-clip:text;color:transparent;}\n"
+            ".tabs{display:flex;flex-wrap:wrap;gap:8px;margin-bottom:16px;}\n"
+            ".tab-btn{padding:8px 12px;border:1px solid rgba(0,229,255,.35);border-radius:10px;cursor:pointer;background:rgba(2,8,23,.6);color:#9beaf9;box-shadow:0 0 8px rgba(0,229,255,.25) inset,0 0 6px rgba(168,85,247,.25);transition:all .2s;}\n"
+            ".tab-btn.active{background:rgba(168,85,247,.15);color:#e5e7eb;border-color:rgba(168,85,247,.45);}\n"
+            ".subtabs{display:flex;gap:6px;margin:8px 0 12px;}\n"
+            ".sub-btn{padding:6px 10px;border:1px solid rgba(0,229,255,.3);border-radius:8px;cursor:pointer;background:rgba(2,8,23,.5);color:#93c5fd;transition:.2s;}\n"
+            ".sub-btn.active{background:rgba(0,229,255,.12);color:#e5e7eb;border-color:rgba(0,229,255,.5);}\n"
+            ".item{border:1px solid rgba(148,163,184,.25);border-radius:12px;padding:12px;margin:10px 0;background:linear-gradient(180deg,rgba(13,18,28,.65),rgba(13,18,28,.4));box-shadow:0 2px 8px rgba(0,0,0,.35);}\n"
+            ".title-link{color:#7dd3fc;text-decoration:none;font-weight:600;}\n"
+            ".meta{color:#94a3b8;font-size:12px;margin-left:8px;}\n"
+            ".link{display:block;margin-top:6px;font-size:12px;color:#cbd5e1;}\n"
+            ".grid-bg{position:fixed;inset:0;background-image:radial-gradient(transparent 0,transparent 1px,rgba(45,212,191,.05) 1px),radial-gradient(transparent 0,transparent 1px,rgba(168,85,247,.06) 1px);background-size:20px 20px,32px 32px;pointer-events:none;opacity:.6;}\n"
+        )
+    if t == "glass":
+        return (
+            "body{background:linear-gradient(135deg,#0b1020,#121a2e 50%,#0b1020);color:#e2e8f0;font-family:Inter,system-ui,-apple-system,BlinkMacSystemFont,'Segoe UI','Helvetica Neue','PingFang SC','Microsoft YaHei',sans-serif;margin:0;}\n"
+            ".container{max-width:1080px;margin:24px auto;padding:24px;}\n"
+            ".title{font-size:22px;margin:0 0 16px;color:#e2e8f0;}\n"
+            ".tabs{display:flex;flex-wrap:wrap;gap:8px;margin-bottom:16px;}\n"
+            ".tab-btn{padding:8px 12px;border:1px solid rgba(226,232,240,.2);border-radius:12px;cursor:pointer;background:rgba(255,255,255,.06);backdrop-filter:blur(8px);color:#e2e8f0;box-shadow:0 8px 24px rgba(0,0,0,.25) inset,0 2px 8px rgba(0,0,0,.35);}\n"
+            ".tab-btn.active{background:rgba(147,197,253,.15);border-color:rgba(147,197,253,.35);}\n"
+            ".subtabs{display:flex;gap:6px;margin:8px 0 12px;}\n"
+            ".sub-btn{padding:6px 10px;border:1px solid rgba(226,232,240,.18);border-radius:10px;background:rgba(255,255,255,.05);cursor:pointer;color:#e2e8f0;}\n"
+            ".sub-btn.active{background:rgba(226,232,240,.12);}\n"
+            ".item{border:1px solid rgba(226,232,240,.18);border-radius:14px;padding:14px;margin:10px 0;background:rgba(255,255,255,.06);backdrop-filter:blur(6px);}\n"
+            ".title-link{color:#93c5fd;text-decoration:none;font-weight:600;}\n"
+            ".meta{color:#cbd5e1;font-size:12px;margin-left:8px;}\n"
+            ".link{display:block;margin-top:6px;font-size:12px;color:#e2e8f0;}\n"
+        )
+    if t == "terminal":
+        return (
+            "body{background:#0a0f0a;color:#c6f6d5;font-family:ui-monospace,SFMono-Regular,Menlo,Monaco,Consolas,'Liberation Mono','Courier New',monospace;margin:0;}\n"
+            ".container{max-width:1080px;margin:24px auto;padding:24px;}\n"
+            ".title{font-size:22px;margin:0 0 16px;color:#68d391;}\n"
+            ".tabs{display:flex;flex-wrap:wrap;gap:8px;margin-bottom:16px;}\n"
+            ".tab-btn{padding:8px 12px;border:1px solid #2f855a;border-radius:8px;cursor:pointer;background:#1a202c;color:#68d391;}\n"
+            ".tab-btn.active{background:#22543d;color:#c6f6d5;}\n"
+            ".subtabs{display:flex;gap:6px;margin:8px 0 12px;}\n"
+            ".sub-btn{padding:6px 10px;border:1px solid #2f855a;border-radius:8px;cursor:pointer;background:#0f1418;color:#68d391;}\n"
+            ".sub-btn.active{background:#22543d;color:#c6f6d5;}\n"
+            ".item{border:1px solid #2f855a;border-radius:8px;padding:12px;margin:10px 0;background:#0f1410;box-shadow:0 2px 6px rgba(0,0,0,.4);}\n"
+            ".title-link{color:#68d391;text-decoration:none;font-weight:700;}\n"
+            ".meta{color:#9ae6b4;font-size:12px;margin-left:8px;}\n"
+            ".link{display:block;margin-top:6px;font-size:12px;color:#c6f6d5;}\n"
+        )
+    # classic (existing styles)
+    return (
+        "body { font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, 'Noto Sans', 'PingFang SC', 'Microsoft YaHei', sans-serif; margin: 20px; }\n"
+        "h1 { font-size: 20px; margin-bottom: 12px; }\n"
+        ".tabs { margin-bottom: 12px; }\n"
+        ".tab-btn { display: inline-block; padding: 6px 10px; margin-right: 8px; border: 1px solid #e5e7eb; border-radius: 6px; cursor: pointer; background: #f9fafb; }\n"
+        ".tab-btn.active { background: #e5e7eb; }\n"
+        ".item { border: 1px solid #e5e7eb; border-radius: 8px; padding: 12px; margin-bottom: 10px; }\n"
+        ".title-link { color: #0366d6; font-weight: 600; display: inline-block; text-decoration:none;}\n"
+        ".meta { color: #6b7280; font-size: 12px; margin-left: 8px; }\n"
+        ".link { display: block; margin-top: 8px; font-size: 12px; color: #374151; }\n"
+        ".subtabs { margin-bottom: 8px; }\n"
+        ".sub-btn { display: inline-block; padding: 4px 8px; margin-right: 6px; border: 1px solid #e5e7eb; border-radius: 6px; cursor: pointer; background: #fff; }\n"
+        ".sub-btn.active { background: #e5e7eb; }\n"
+    )
+
+
+# Shared by all themes: incomplete-section notice, the collapsible summaries of the eastmoney tab page and the trend tab
+COMMON_CSS = (
+    ".status-note{border:1px dashed #f59e0b;border-radius:6px;padding:8px 10px;color:#b45309;background:rgba(245,158,11,.08);font-size:13px;}\n"
+    ".title-toggle { cursor: pointer; color: #0366d6; font-weight: 600; display: inline-block; }\n"
+    ".summary { display: none; margin-top: 8px; line-height: 1.6; }\n"
+    ".trend-table{border-collapse:collapse;font-size:13px;margin-bottom:12px;}\n"
+    ".trend-table th,.trend-table td{padding:4px 10px;text-align:left;border-bottom:1px solid rgba(148,163,184,.25);}\n"
+    ".spark{vertical-align:middle;color:#0ea5e9;}\n"
+)
+
+# Tab switching is driven by the DOM (buttons `btn-tab-<id>` / panels `tab-<id>`),
+# so the same script serves every page regardless of which tabs it has.
+PAGE_JS = """
+function toggle(id){
+  var el = document.getElementById(id);
+  if (!el) return;
+  el.style.display = (el.style.display === 'none' || el.style.display === '') ? 'block' : 'none';
+}
+function switchTab(tab){
+  var btns = document.querySelectorAll('.tabs .tab-btn');
+  for (var i=0;i<btns.length;i++){
+    var id = btns[i].id.slice(4);
+    var el = document.getElementById(id);
+    if (!el) continue;
+    if (id === 'tab-'+tab){ el.style.display='block'; btns[i].classList.add('active'); } else { el.style.display='none'; btns[i].classList.remove('active'); }
+  }
+  if (tab.indexOf('stock-')===0 && window.loadStock) loadStock(tab.slice(6));
+}
+function switchStockTab(code, sub){
+  var hot = document.getElementById('stock-'+code+'-hot');
+  var rep = document.getElementById('stock-'+code+'-report');
+  var bhot = document.getElementById('btn-stock-'+code+'-hot');
+  var brep = document.getElementById('btn-stock-'+code+'-report');
+  if (sub==='hot'){ hot.style.display='block'; rep.style.display='none'; bhot.classList.add('active'); brep.classList.remove('active'); }
+  else { hot.style.display='none'; rep.style.display='block'; bhot.classList.remove('active'); brep.classList.add('active'); }
+}
+window.addEventListener('DOMContentLoaded', function(){ var b = document.querySelector('.tabs .tab-btn'); if (b) switchTab(b.id.slice(8)); });
+"""
+
+
+def page_css(theme: str) -> str:
+    return theme_css(theme) + COMMON_CSS
+
+
+def minify_css(css: str) -> str:
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};:,>])\s*", r"\1", css)
+    return css.replace(";}", "}").strip()
+
+
+def minify_js(js: str) -> str:
+    # Conservative: drop indentation and blank lines only (statements keep their newlines)
+    return "\n".join(line.strip() for line in js.splitlines() if line.strip())
+
+
+def _write_hashed(out_dir: str, stem: str, ext: str, content: str) -> str:
+    digest = hashlib.sha256(content.encode("utf-8")).hexdigest()[:10]
+    rel = f"{ASSETS_DIR}/{stem}.{digest}.{ext}"
+    path = os.path.join(out_dir, ASSETS_DIR, f"{stem}.{digest}.{ext}")
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp, path)
+    return rel
+
+
+def write_assets(out_dir: str, theme: str) -> dict:
+    """Ensure the minified, content-hashed CSS/JS for `theme` exist; returns page-relative hrefs."""
+    t = (theme or "classic").lower()
+    return {
+        "css": _write_hashed(out_dir, f"news-{t}", "css", minify_css(page_css(t))),
+        "js": _write_hashed(out_dir, "news", "js", minify_js(PAGE_JS)),
+    }
+
+
+def head_assets(theme: str, assets: dict = None, extra_js: str = "") -> str:
+    """`<style>/<script>` inline (assets None) or `<link>/<script src>` tags for a page head."""
+    if assets:
+        out = (
+            f"  <link rel=\"stylesheet\" href=\"{assets['css']}\" />\n"
+            f"  <script src=\"{assets['js']}\"></script>\n"
+        )
+    else:
+        out = (
+            "  <style>\n" + page_css(theme) + "  </style>\n"
+            "  <script>\n" + PAGE_JS + "  </script>\n"
+        )
+    if extra_js:
+        out += "  <script>\n" + extra_js + "  </script>\n"
+    return out
@@ -1,19 +1,231 @@
 #!/usr/bin/env python3
 import os
 import sys
-from datetime import date, timedelta
+import time
+import threading
 import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
+import numpy as np
 import pandas as pd
 import tushare as ts
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bar_store import BarStore, DEFAULT_DB, plan_weekly_fetch
+from codes_file import read_codes
+
+
+# Tushare quota errors, e.g. "抱歉，您每分钟最多访问该接口200次"
+THROTTLE_MARKERS = ("每分钟", "最多访问", "频率", "rate limit", "too many")
+
+
+def sync_weekly(store: BarStore, ts_code: str, history_weeks: int = 20):
+    """Pull only weekly bars missing from the local store; returns the number of API calls made."""
+    window = plan_weekly_fetch(store, ts_code, history_weeks=history_weeks)
+    if window is None:
+        return 0
+    start_str, end_str = window
+    df = ts.pro_bar(
+        ts_code=ts_code,
+        asset="E",
+        freq="W",
+        start_date=start_str,
+        end_date=end_str,
+    )
+    if df is None:
+        # pro_bar swallows request errors (quota included), prints them and returns None
+        raise RuntimeError("pro_bar returned no data (request failed or throttled)")
+    store.replace_from(ts_code, "W", start_str, df)
+    return 1
+
+
+class RateLimiter:
+    """Spread calls evenly under a calls-per-minute budget shared by all worker threads."""
+
+    def __init__(self, calls_per_minute: float):
+        self.interval = 60.0 / calls_per_minute if calls_per_minute > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def is_throttled(exc: Exception) -> bool:
+    msg = str(exc).lower()
+    return any(m in msg for m in THROTTLE_MARKERS)
+
+
+def batch_sync(store: BarStore, codes, workers: int = 4, calls_per_minute: float = 200, retries: int = 3,
+               history_weeks: int = 20, per_code_dir: str = None, on_done=None):
+    """Sync many codes with `pro_bar` on a thread pool under a shared per-minute call budget.
+
+    Throttled calls back off and retry, as do calls where `pro_bar` returns None (it
+    swallows request errors, quota ones included); other errors are reported per code.
+    Each code's bars are written to the store (and `per_code_dir/<ts_code>.csv`) as soon
+    as its call completes. Returns {ts_code: (api_calls, error or None)}.
+    """
+    limiter = RateLimiter(calls_per_minute)
+    store_lock = threading.Lock()
+
+    def _one(code):
+        with store_lock:
+            window = plan_weekly_fetch(store, code, history_weeks=history_weeks)
+        if window is None:
+            return 0
+        start_str, end_str = window
+        calls = 0
+        for attempt in range(retries + 1):
+            limiter.acquire()
+            calls += 1
+            try:
+                df = ts.pro_bar(ts_code=code, asset="E", freq="W", start_date=start_str, end_date=end_str)
+            except Exception as e:
+                if not is_throttled(e) or attempt == retries:
+                    raise
+            else:
+                if df is not None:
+                    break
+                # pro_bar swallows request errors (quota included) and returns None; retry like a throttle
+                if attempt == retries:
+                    raise RuntimeError(f"pro_bar returned no data after {calls} calls (request failed or throttled)")
+            time.sleep(min(60.0, max(limiter.interval, 1.0) * 2 ** attempt))
+        with store_lock:
+            store.replace_from(code, "W", start_str, df)
+            if per_code_dir:
+                os.makedirs(per_code_dir, exist_ok=True)
+                store.read(code, "W").to_csv(os.path.join(per_code_dir, f"{code}.csv"), index=False)
+        return calls
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(_one, code): code for code in codes}
+        for fut in as_completed(futures):
+            code = futures[fut]
+            try:
+                results[code] = (fut.result(), None)
+            except Exception as e:
+                results[code] = (0, e)
+            if on_done:
+                on_done(code, *results[code])
+    return results
+
+
+def weekly_analytics(bars, ret_weeks: int = 4, vol_weeks: int = 10):
+    """Per-code weekly change, N-week return, volatility and ranks over a stacked long frame.
+
+    `bars` holds (ts_code, date, close) for many codes. Everything is computed with
+    grouped/vectorized pandas ops over the whole frame; returns one row per code
+    (its latest bar) sorted by the N-week return rank.
+    """
+    df = bars[["ts_code", "date", "close"]].sort_values(["ts_code", "date"], kind="mergesort").reset_index(drop=True)
+    close = df["close"].to_numpy(dtype="float64")
+    codes = df["ts_code"].to_numpy()
+    pos = df.groupby("ts_code", sort=False).cumcount().to_numpy()
+
+    def _lag(k):
+        # Shift the whole column and blank positions that would reach into the previous code
+        out = np.full_like(close, np.nan)
+        if 0 < k < len(close):
+            out[k:] = close[:-k]
+        out[pos < k] = np.nan
+        return out
+
+    df["weekly_pct_chg"] = (close / _lag(1) - 1) * 100
+    df[f"ret_{ret_weeks}w"] = (close / _lag(ret_weeks) - 1) * 100
+    # Rolling std per code, so rounding error does not carry across code boundaries
+    vol = (
+        df.groupby("ts_code", sort=False)["weekly_pct_chg"]
+        .rolling(vol_weeks, min_periods=vol_weeks).std()
+        .reset_index(level=0, drop=True)
+    )
+    df[f"vol_{vol_weeks}w"] = vol * np.sqrt(52)
+
+    is_last = np.append(codes[1:] != codes[:-1], True) if len(codes) else np.array([], dtype=bool)
+    latest = df[is_last].copy()
+    for col in ("weekly_pct_chg", f"ret_{ret_weeks}w", f"vol_{vol_weeks}w"):
+        latest[f"rank_{col}"] = latest[col].rank(ascending=(col.startswith("vol_")), method="min").astype("Int64")
+    latest["bars"] = (pos[is_last] + 1)
+    return latest.sort_values(f"rank_ret_{ret_weeks}w", na_position="last").reset_index(drop=True)
+
+
+def synthetic_bars(n_codes: int, n_weeks: int = 260, seed: int = 0):
+    """Random-walk weekly closes for `n_codes` fake codes, stacked long (for benchmarking)."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(end=pd.Timestamp.today().normalize(), periods=n_weeks, freq="W-FRI")
+    rets = rng.normal(0.002, 0.04, size=(n_codes, n_weeks))
+    closes = 20 * np.exp(np.cumsum(rets, axis=1))
+    return pd.DataFrame({
+        "ts_code": np.repeat([f"{600000 + i:06d}.SH" for i in range(n_codes)], n_weeks),
+        "date": np.tile(dates.to_numpy(), n_codes),
+        "close": closes.ravel(),
+    })
+
+
+def run_bench(n_codes: int, n_weeks: int, ret_weeks: int, vol_weeks: int):
+    bars = synthetic_bars(n_codes, n_weeks)
+    t0 = time.perf_counter()
+    table = weekly_analytics(bars, ret_weeks=ret_weeks, vol_weeks=vol_weeks)
+    dt = time.perf_counter() - t0
+    print(f"[bench] {n_codes} codes x {n_weeks} weeks = {len(bars)} bars -> {len(table)} rows in {dt * 1000:.1f} ms")
+
+
+def watchlist(codes, args):
+    store = BarStore(args.store)
+
+    def _report(code, n_calls, err):
+        if err is not None:
+            print(f"[warn] {code}: Tushare request failed: {err}")
+
+    results = batch_sync(
+        store, codes, workers=args.workers, calls_per_minute=args.calls_per_minute, retries=args.retries,
+        history_weeks=args.history_weeks, per_code_dir=args.per_code_dir, on_done=_report,
+    )
+    calls = sum(n for n, _ in results.values())
+    bars = store.read_many(codes, "W")
+    store.close()
+    if bars.empty:
+        print("[error] No data retrieved. Check ts_codes, token, or date range.")
+        sys.exit(1)
+    table = weekly_analytics(bars, ret_weeks=args.ret_weeks, vol_weeks=args.vol_weeks)
+    table["date"] = table["date"].dt.date
+    print(f"[info] {len(codes)} codes, {len(bars)} weekly bars ({calls} API calls)")
+    print(table.to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        table.to_csv(args.out, index=False)
+        print(f"Saved CSV to {os.path.abspath(args.out)}")
+    except Exception as e:
+        print(f"[warn] Could not save CSV: {e}")
+
 
 def main():
     parser = argparse.ArgumentParser(description="Fetch last 10 weeks of KSOFT (688111.SH) weekly data via Tushare")
     parser.add_argument("--token", dest="token", default=os.getenv("TS_TOKEN"), help="Tushare token (or set env TS_TOKEN)")
     parser.add_argument("--ts-code", dest="ts_code", default="688111.SH", help="TS code, default 688111.SH")
+    parser.add_argument("--store", dest="store", default=DEFAULT_DB, help="Local bar store (SQLite), default data/bars.sqlite")
+    parser.add_argument("--history-weeks", dest="history_weeks", type=int, default=20, help="Weeks to pull on first sync of a code")
+    parser.add_argument("--codes", dest="codes", default=None, help="Watchlist mode: comma-separated ts_codes")
+    parser.add_argument("--codes-file", dest="codes_file", default=None, help="Watchlist mode: file with one ts_code per line")
+    parser.add_argument("--ret-weeks", dest="ret_weeks", type=int, default=4, help="N for the N-week return (watchlist mode)")
+    parser.add_argument("--vol-weeks", dest="vol_weeks", type=int, default=10, help="Window for weekly volatility (watchlist mode)")
+    parser.add_argument("--out", dest="out", default=os.path.join(os.path.dirname(__file__), "..", "data", "weekly_watchlist.csv"), help="CSV output for watchlist mode")
+    parser.add_argument("--workers", dest="workers", type=int, default=4, help="Parallel pro_bar calls (watchlist mode)")
+    parser.add_argument("--calls-per-minute", dest="calls_per_minute", type=float, default=200, help="Tushare call budget per minute")
+    parser.add_argument("--retries", dest="retries", type=int, default=3, help="Retries for throttled calls")
+    parser.add_argument("--per-code-dir", dest="per_code_dir", default=None, help="Also write <ts_code>.csv per code as each completes")
+    parser.add_argument("--bench", dest="bench", type=int, default=0, help="Benchmark analytics on N synthetic codes and exit")
     args = parser.parse_args()
 
+    if args.bench:
+        run_bench(args.bench, max(args.history_weeks, 260), args.ret_weeks, args.vol_weeks)
+        return
+
     token = args.token
     if not token:
         print("[error] Missing Tushare token. Pass with --token or export TS_TOKEN.")
@@ -24,33 +236,27 @@ def main():
     # Initialize pro API (not strictly needed for pro_bar but conventional)
     _ = ts.pro_api()
 
-    ts_code = args.ts_code  # 金山办公（A股科创板）
+    codes = read_codes(args.codes, args.codes_file)
+    if codes:
+        watchlist(codes, args)
+        return
 
-    # Fetch ~20 weeks window to ensure we have at least 10 bars
-    end_date = date.today()
-    start_date = end_date - timedelta(weeks=20)
-    start_str = start_date.strftime("%Y%m%d")
-    end_str = end_date.strftime("%Y%m%d")
+    ts_code = args.ts_code  # 金山办公（A股科创板）
 
+    # Only bars newer than the store's last trade_date are requested (none once the week is closed)
+    store = BarStore(args.store)
     try:
-        df = ts.pro_bar(
-            ts_code=ts_code,
-            asset="E",
-            freq="W",
-            start_date=start_str,
-            end_date=end_str,
-        )
+        calls = sync_weekly(store, ts_code, history_weeks=args.history_weeks)
     except Exception as e:
         print(f"[error] Tushare request failed: {e}")
         sys.exit(1)
 
+    df = store.read(ts_code, "W")
+    store.close()
     if df is None or df.empty:
         print("[error] No data retrieved. Check ts_code, token, or date range.")
         sys.exit(1)
-
-    df = df.copy()
-    df["date"] = pd.to_datetime(df["trade_date"], format="%Y%m%d")
-    df.sort_values("date", inplace=True)
+    print(f"[info] {len(df)} weekly bars in store for {ts_code} ({calls} API call{'s' if calls != 1 else ''})")
 
     # Keep last 10 weeks
     last10 = df.tail(10).copy()
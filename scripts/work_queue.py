@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""SQLite work queue for large 10jqka watchlist sweeps across worker processes.
+
+A run splits its codes into batches (jobs). Workers, on this host or on others
+sharing the filesystem, claim one pending job at a time inside an immediate
+transaction, hold it under a lease renewed by a heartbeat thread, fetch and
+parse each code with `build_combined_news.fetch_stock`, and store per-code results.
+A job whose lease expires (crashed or stalled worker) becomes claimable again
+until it has used `max_attempts`. Once a run has no pending or claimed jobs, the
+coordinator fetches the base sections once and assembles the combined page.
+
+Usage:
+  python3 scripts/work_queue.py enqueue --queue Data/queue.sqlite --codes-file watchlist.txt [--batch-size 20] [--start YYYY-MM-DD --end YYYY-MM-DD]
+  python3 scripts/work_queue.py worker --queue Data/queue.sqlite [--threads 4] [--lease 120] [--forever]
+  python3 scripts/work_queue.py assemble --queue Data/queue.sqlite --run RUN_ID --out combined_sweep.html [--theme classic] [--timeout 3600]
+  python3 scripts/work_queue.py status --queue Data/queue.sqlite [--run RUN_ID]
+"""
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+import build_combined_news as builder
+from codes_file import read_codes
+import theme_assets
+
+
+DEFAULT_QUEUE = "Data/queue.sqlite"
+
+
+class WorkQueue:
+    def __init__(self, path: str = DEFAULT_QUEUE):
+        self.path = os.path.abspath(path)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # Autocommit; claims take the write lock explicitly with BEGIN IMMEDIATE
+        self.conn = sqlite3.connect(self.path, timeout=60, isolation_level=None, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS runs (run_id TEXT PRIMARY KEY, start TEXT NOT NULL, end TEXT NOT NULL, "
+            "created TEXT NOT NULL, codes TEXT NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs (id INTEGER PRIMARY KEY, run_id TEXT NOT NULL, codes TEXT NOT NULL, "
+            "state TEXT NOT NULL DEFAULT 'pending', owner TEXT, token TEXT, lease_until REAL, attempts INTEGER NOT NULL DEFAULT 0, "
+            "max_attempts INTEGER NOT NULL, error TEXT, finished REAL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, lease_until)")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS results (run_id TEXT NOT NULL, code TEXT NOT NULL, payload TEXT, error TEXT, "
+            "worker TEXT, finished REAL, PRIMARY KEY (run_id, code))"
+        )
+
+    def close(self):
+        self.conn.close()
+
+    def _execute(self, sql, params=()):
+        with self.lock:
+            return self.conn.execute(sql, params)
+
+    def enqueue(self, codes, start: str, end: str, batch_size: int = 20, max_attempts: int = 3) -> str:
+        run_id = datetime.now().strftime("%Y%m%d_%H%M%S_") + uuid.uuid4().hex[:6]
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.execute(
+                    "INSERT INTO runs (run_id, start, end, created, codes) VALUES (?, ?, ?, ?, ?)",
+                    (run_id, start, end, datetime.now().isoformat(timespec="seconds"), json.dumps(codes)),
+                )
+                self.conn.executemany(
+                    "INSERT INTO jobs (run_id, codes, max_attempts) VALUES (?, ?, ?)",
+                    [(run_id, json.dumps(codes[i:i + batch_size]), max_attempts) for i in range(0, len(codes), batch_size)],
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return run_id
+
+    def claim(self, owner: str, lease: float):
+        """Atomically take one pending (or lease-expired) job; returns (job_id, token, run, codes) or None.
+
+        Expired jobs that already used all attempts are marked failed instead.
+        """
+        now = time.time()
+        token = uuid.uuid4().hex
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.execute(
+                    "UPDATE jobs SET state='failed', error=COALESCE(error, 'lease expired'), finished=? "
+                    "WHERE state='claimed' AND lease_until<? AND attempts>=max_attempts",
+                    (now, now),
+                )
+                row = self.conn.execute(
+                    "SELECT id, run_id, codes FROM jobs WHERE state='pending' OR (state='claimed' AND lease_until<?) "
+                    "ORDER BY id LIMIT 1",
+                    (now,),
+                ).fetchone()
+                if row is None:
+                    self.conn.execute("COMMIT")
+                    return None
+                self.conn.execute(
+                    "UPDATE jobs SET state='claimed', owner=?, token=?, lease_until=?, attempts=attempts+1 WHERE id=?",
+                    (owner, token, now + lease, row[0]),
+                )
+                run = self.conn.execute("SELECT run_id, start, end FROM runs WHERE run_id=?", (row[1],)).fetchone()
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return row[0], token, {"run_id": run[0], "start": run[1], "end": run[2]}, json.loads(row[2])
+
+    def heartbeat(self, job_id: int, token: str, lease: float) -> bool:
+        """Extend the lease; False once the job was reclaimed by someone else."""
+        cur = self._execute(
+            "UPDATE jobs SET lease_until=? WHERE id=? AND token=? AND state='claimed'", (time.time() + lease, job_id, token)
+        )
+        return cur.rowcount == 1
+
+    def put_result(self, run_id: str, code: str, payload, error: str, worker: str):
+        self._execute(
+            "INSERT OR REPLACE INTO results (run_id, code, payload, error, worker, finished) VALUES (?, ?, ?, ?, ?, ?)",
+            (run_id, code, json.dumps(payload, ensure_ascii=False) if payload is not None else None, error, worker, time.time()),
+        )
+
+    def finish(self, job_id: int, token: str, error: str = None) -> bool:
+        cur = self._execute(
+            "UPDATE jobs SET state=?, error=?, finished=?, lease_until=NULL WHERE id=? AND token=? AND state='claimed'",
+            ("failed" if error else "done", error, time.time(), job_id, token),
+        )
+        return cur.rowcount == 1
+
+    def release(self, job_id: int, token: str, error: str):
+        """Give a job back after a worker-level error so it is retried (or failed at max_attempts)."""
+        self._execute(
+            "UPDATE jobs SET lease_until=0, error=? WHERE id=? AND token=? AND state='claimed'", (error, job_id, token)
+        )
+
+    def counts(self, run_id: str = None) -> dict:
+        sql = "SELECT state, COUNT(*) FROM jobs" + (" WHERE run_id=?" if run_id else "") + " GROUP BY state"
+        out = {"pending": 0, "claimed": 0, "done": 0, "failed": 0}
+        out.update(dict(self._execute(sql, (run_id,) if run_id else ()).fetchall()))
+        return out
+
+    def run_info(self, run_id: str):
+        row = self._execute("SELECT run_id, start, end, codes FROM runs WHERE run_id=?", (run_id,)).fetchone()
+        if row is None:
+            return None
+        return {"run_id": row[0], "start": row[1], "end": row[2], "codes": json.loads(row[3])}
+
+    def results(self, run_id: str) -> dict:
+        out = {}
+        for code, payload, error in self._execute("SELECT code, payload, error FROM results WHERE run_id=?", (run_id,)):
+            out[code] = {"section": json.loads(payload) if payload else None, "error": error}
+        return out
+
+
+class _Heartbeat(threading.Thread):
+    def __init__(self, queue: WorkQueue, job_id: int, token: str, lease: float):
+        super().__init__(daemon=True)
+        self.queue, self.job_id, self.token, self.lease = queue, job_id, token, lease
+        self.stop = threading.Event()
+        self.lost = False
+
+    def run(self):
+        while not self.stop.wait(self.lease / 3):
+            try:
+                if not self.queue.heartbeat(self.job_id, self.token, self.lease):
+                    self.lost = True
+                    return
+            except sqlite3.Error:
+                continue  # transient lock contention; the next beat retries well within the lease
+
+
+def run_worker(queue: WorkQueue, threads: int = 4, lease: float = 120, forever: bool = False, poll: float = 5,
+               worker_id: str = None) -> int:
+    """Claim and process jobs until the queue is drained (or forever); returns jobs completed."""
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    ths = builder._load_module(os.path.join(HERE, "fetch_10jqka_stock_news.py"))
+    done = 0
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        while True:
+            claimed = queue.claim(worker_id, lease)
+            if claimed is None:
+                c = queue.counts()
+                if not forever and c["pending"] == 0 and c["claimed"] == 0:
+                    return done
+                time.sleep(poll)  # other workers hold leases that may still expire
+                continue
+            job_id, token, run, codes = claimed
+            hb = _Heartbeat(queue, job_id, token, lease)
+            hb.start()
+            t0 = time.time()
+            try:
+                def _one(code):
+                    try:
+                        return code, builder.fetch_stock(ths, code, run["start"], run["end"]), None
+                    except Exception as e:
+                        return code, None, f"{type(e).__name__}: {e}"
+
+                n_err = 0
+                for code, section, error in pool.map(_one, codes):
+                    if hb.lost:
+                        break
+                    n_err += error is not None
+                    queue.put_result(run["run_id"], code, section, error, worker_id)
+            except Exception as e:
+                hb.stop.set()
+                queue.release(job_id, token, f"{type(e).__name__}: {e}")
+                print(f"[warn] job {job_id}: {type(e).__name__}: {e}")
+                continue
+            hb.stop.set()
+            if hb.lost or not queue.finish(job_id, token):
+                print(f"[warn] job {job_id}: lease lost, left to the new owner")
+                continue
+            done += 1
+            print(f"[{worker_id}] job {job_id}: {len(codes)} codes ({n_err} failed) in {time.time() - t0:.1f}s")
+
+
+def assemble(queue: WorkQueue, run_id: str, out_path: str, theme: str = "classic", timeout: float = None,
+             poll: float = 5, deadline: float = None, standalone: bool = False, append_ts: bool = True) -> str:
+    """Wait for the run to drain, fetch the base sections once and write the combined page."""
+    run = queue.run_info(run_id)
+    if run is None:
+        raise KeyError(f"unknown run {run_id}")
+    t0 = time.time()
+    while True:
+        c = queue.counts(run_id)
+        if c["pending"] == 0 and c["claimed"] == 0:
+            break
+        if timeout is not None and time.time() - t0 > timeout:
+            print(f"[warn] run {run_id} not drained after {timeout:g}s ({c['pending']} pending, {c['claimed']} claimed); assembling what is done")
+            break
+        time.sleep(poll)
+
+    east = builder._load_module(os.path.join(HERE, "fetch_eastmoney_cgnjj.py"))
+    start, end = run["start"], run["end"]
+    results, section_status = builder.run_with_deadline({
+        "domestic": lambda: builder.fetch_column(east, 350, start, end),
+        "international": lambda: builder.fetch_column(east, 351, start, end),
+        "industry": lambda: builder.fetch_industry(east, start, end),
+    }, deadline)
+    builder.add_coverage_status(section_status, results, start, end)
+    stored = queue.results(run_id)
+    stock_sections = {}
+    for code in run["codes"]:
+        r = stored.get(code) or {"section": None, "error": "未完成（任务失败或未被处理）"}
+        sec = r["section"] or {"hot_news": [], "related_reports": []}
+        stock_sections[code] = {"hot_news": sec["hot_news"], "related_reports": sec["related_reports"],
+                                "range_start": start, "range_end": end}
+        if r["error"]:
+            section_status[f"stock-{code}"] = r["error"]
+
+    domestic = results.get("domestic") or []
+    international = results.get("international") or []
+    industry = results.get("industry") or []
+    assets = None if standalone else theme_assets.write_assets(os.path.dirname(out_path) or "Data", theme)
+    html = builder.build_html_combined(
+        domestic, international, industry, stock_sections, theme=theme,
+        page_title=builder.page_title_for(start, end), section_status=section_status, assets=assets,
+    )
+    counts = builder.section_counts(domestic, international, industry, stock_sections)
+    return builder.write_page(out_path, html, append_ts=append_ts, start=start, end=end,
+                              codes=run["codes"], counts=counts, theme=theme)
+
+
+def main():
+    today = datetime.now().strftime("%Y-%m-%d")
+    parser = argparse.ArgumentParser(description="SQLite work queue for distributed stock sweeps")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--queue", default=DEFAULT_QUEUE, help=f"Queue database (default {DEFAULT_QUEUE})")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    eq = sub.add_parser("enqueue", parents=[common], help="Create a run and split its codes into jobs")
+    eq.add_argument("--codes", default="", help="Comma-separated codes, e.g. 688111,HK2097")
+    eq.add_argument("--codes-file", default=None, help="File with codes (comma/newline separated, # comments)")
+    eq.add_argument("--start", default=today)
+    eq.add_argument("--end", default=None, help="YYYY-MM-DD (default --start)")
+    eq.add_argument("--batch-size", type=int, default=20, help="Codes per job (default 20)")
+    eq.add_argument("--max-attempts", type=int, default=3, help="Claims per job before it is failed (default 3)")
+    wk = sub.add_parser("worker", parents=[common], help="Claim and process jobs until the queue drains")
+    wk.add_argument("--threads", type=int, default=4, help="Concurrent fetches inside a job (default 4)")
+    wk.add_argument("--lease", type=float, default=120, help="Lease seconds, renewed every lease/3 (default 120)")
+    wk.add_argument("--poll", type=float, default=5, help="Seconds between polls when nothing is claimable")
+    wk.add_argument("--forever", action="store_true", help="Keep polling after the queue drains")
+    wk.add_argument("--worker-id", default=None)
+    asm = sub.add_parser("assemble", parents=[common], help="Wait for a run to drain and build the combined page")
+    asm.add_argument("--run", required=True)
+    asm.add_argument("--out", default="combined_sweep.html")
+    asm.add_argument("--theme", default="classic", help="classic|neon|glass|terminal")
+    asm.add_argument("--timeout", type=float, default=None, help="Stop waiting after N seconds and assemble what is done")
+    asm.add_argument("--poll", type=float, default=5)
+    asm.add_argument("--deadline", type=float, default=None, help="Time budget (seconds) for the base sections")
+    asm.add_argument("--standalone", action="store_true", help="Inline CSS/JS instead of linking assets/")
+    asm.add_argument("--no-ts", action="store_true", help="Keep the exact output filename")
+    st = sub.add_parser("status", parents=[common], help="Job counts per state")
+    st.add_argument("--run", default=None)
+    args = parser.parse_args()
+
+    queue = WorkQueue(args.queue)
+    try:
+        if args.cmd == "enqueue":
+            codes = read_codes(args.codes, args.codes_file)
+            if not codes:
+                print("[error] No codes given (use --codes or --codes-file)", file=sys.stderr)
+                sys.exit(1)
+            run_id = queue.enqueue(codes, args.start, args.end or args.start, args.batch_size, args.max_attempts)
+            n_jobs = (len(codes) + args.batch_size - 1) // args.batch_size
+            print(f"Run {run_id}: {len(codes)} codes in {n_jobs} jobs")
+            print(run_id)
+        elif args.cmd == "worker":
+            n = run_worker(queue, threads=args.threads, lease=args.lease, forever=args.forever, poll=args.poll,
+                           worker_id=args.worker_id)
+            print(f"Queue drained; this worker completed {n} jobs")
+        elif args.cmd == "assemble":
+            path = assemble(queue, args.run, args.out, theme=args.theme, timeout=args.timeout, poll=args.poll,
+                            deadline=args.deadline, standalone=args.standalone, append_ts=not args.no_ts)
+            print(f"Wrote combined HTML to {path} ({queue.counts(args.run)})")
+        else:
+            print(json.dumps(queue.counts(args.run), ensure_ascii=False))
+    finally:
+        queue.close()
+
+
+if __name__ == "__main__":
+    main()